@@ -9,30 +9,85 @@ mongo = PyMongo()
 jwt = JWTManager()
 mail = Mail()
 
+def mongo_client_options(config):
+    from app.utils.monitoring import command_metrics, pool_metrics
+    
+    options = {
+        'maxPoolSize': config['MONGO_MAX_POOL_SIZE'],
+        'minPoolSize': config['MONGO_MIN_POOL_SIZE'],
+        'maxIdleTimeMS': config['MONGO_MAX_IDLE_TIME_MS'],
+        'waitQueueTimeoutMS': config['MONGO_WAIT_QUEUE_TIMEOUT_MS'],
+        'connectTimeoutMS': config['MONGO_CONNECT_TIMEOUT_MS'],
+        'socketTimeoutMS': config['MONGO_SOCKET_TIMEOUT_MS'],
+        'serverSelectionTimeoutMS': config['MONGO_SERVER_SELECTION_TIMEOUT_MS'],
+        'readPreference': config['MONGO_READ_PREFERENCE'],
+        'event_listeners': [pool_metrics, command_metrics]
+    }
+    if config['MONGO_COMPRESSORS']:
+        options['compressors'] = config['MONGO_COMPRESSORS']
+    return options
+
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
     # Initialize extensions
-    mongo.init_app(app)
+    mongo.init_app(app, **mongo_client_options(app.config))
     jwt.init_app(app)
     mail.init_app(app)
     CORS(app, resources={r"/api/*": {"origins": "*"}})
     
+    from app.utils.cache import response_cache
+    from app.utils.passwords import password_hasher
+    from app.utils.monitoring import request_metrics
+    from app.utils.serialization import json_provider
+    from app.utils.tokens import token_verifier
+    from app.stream.feed import change_feed
+    app.json = json_provider(app)
+    response_cache.init_app(app)
+    password_hasher.init_app(app)
+    token_verifier.init_app(app)
+    request_metrics.init_app(app)
+    change_feed.init_app(app)
+    
     # Register blueprints
     from app.auth.routes import auth_bp
     from app.transactions.routes import transactions_bp
     from app.budgets.routes import budgets_bp
+    from app.health.routes import health_bp
+    from app.stream.routes import stream_bp
+    from app.sync.routes import sync_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(transactions_bp, url_prefix='/api/transactions')
     app.register_blueprint(budgets_bp, url_prefix='/api/budgets')
+    app.register_blueprint(health_bp, url_prefix='/api')
+    app.register_blueprint(stream_bp, url_prefix='/api')
+    app.register_blueprint(sync_bp, url_prefix='/api')
+    
+    # Register CLI commands
+    from app.utils.rollups import rebuild_rollups_command
+    from app.utils.outbox import outbox_worker_command
+    from app.indexes import init_indexes_command
+    from app.query_shapes import explain_queries_command
+    from app.transactions.search import rebuild_search_terms_command
+    from app.transactions.archive import archive_transactions_command
+    
+    app.cli.add_command(rebuild_rollups_command)
+    app.cli.add_command(init_indexes_command)
+    app.cli.add_command(explain_queries_command)
+    app.cli.add_command(rebuild_search_terms_command)
+    app.cli.add_command(archive_transactions_command)
+    app.cli.add_command(outbox_worker_command)
+    
+    # Indexes are built by `flask init-indexes`; booting only checks when asked
+    if app.config['CHECK_INDEXES_ON_STARTUP']:
+        from app.indexes import check_indexes
+        check_indexes(app)
     
-    # Create indexes
-    with app.app_context():
-        mongo.db.users.create_index('email', unique=True)
-        mongo.db.transactions.create_index([('user_id', 1), ('date', -1)])
-        mongo.db.budgets.create_index([('user_id', 1), ('category', 1)])
-        mongo.db.password_resets.create_index('expires_at', expireAfterSeconds=0)
+    # Deliver queued notifications from serving processes (otherwise run `flask outbox-worker`)
+    if app.config['OUTBOX_WORKER_THREADS']:
+        from app.utils.outbox import start_with_requests
+        start_with_requests(app, app.config['OUTBOX_WORKER_THREADS'])
     
     return app
\ No newline at end of file
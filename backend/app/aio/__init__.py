@@ -0,0 +1,37 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.routing import Mount, Route
+from app import create_app, mongo_client_options
+from app.config import Config
+
+def create_asgi_app(config_class=Config):
+    # Async (Motor) handlers for the read-heavy endpoints; every other
+    # route falls through to the regular Flask app
+    flask_app = create_app(config_class)
+    
+    from app.aio.routes import get_transactions, get_stats, get_budgets, get_budget_overview, get_budget
+    
+    routes = [
+        Route('/api/transactions/', get_transactions, methods=['GET']),
+        Route('/api/transactions/stats', get_stats, methods=['GET']),
+        Route('/api/budgets/', get_budgets, methods=['GET']),
+        Route('/api/budgets/overview', get_budget_overview, methods=['GET']),
+        Route('/api/budgets/{budget_id}', get_budget, methods=['GET']),
+        # A real thread pool: asgiref's WsgiToAsgi runs every Flask request on
+        # one shared thread. An open /api/stream connection holds one of these
+        # threads for its whole life, so keep STREAM_MAX_CONNECTIONS well below it
+        Mount('/', app=WSGIMiddleware(flask_app, workers=flask_app.config['ASGI_WSGI_THREADS']))
+    ]
+    
+    # CORS preflights (OPTIONS) don't match the GET-only routes above and
+    # are answered by Flask-CORS through the mount
+    app = Starlette(routes=routes)
+    
+    options = mongo_client_options(flask_app.config)
+    options['maxPoolSize'] = flask_app.config['ASYNC_MONGO_MAX_POOL_SIZE']
+    client = AsyncIOMotorClient(flask_app.config['MONGO_URI'], **options)
+    app.state.flask_app = flask_app
+    app.state.db = client.get_default_database()
+    
+    return app
@@ -0,0 +1,29 @@
+from functools import wraps
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from app.utils.serialization import dumps
+from app.utils.tokens import bearer_token, token_verifier
+
+def json_response(data, status_code=200):
+    return Response(dumps(data), status_code=status_code, media_type='application/json',
+                    headers={'Access-Control-Allow-Origin': '*'})
+
+def _verify(flask_app, header):
+    # Same verification cache and revocation checks as the Flask routes; a
+    # cache miss or blocklist refresh does I/O, so this runs off the event loop
+    with flask_app.app_context():
+        return token_verifier.verify(bearer_token(header))
+
+def jwt_required_async(fn):
+    @wraps(fn)
+    async def wrapper(request):
+        flask_app = request.app.state.flask_app
+        
+        try:
+            claims = await run_in_threadpool(_verify, flask_app, request.headers.get('Authorization', ''))
+        except Exception as e:
+            return json_response({'error': 'Invalid or expired token'}, 401)
+        
+        request.state.user_id = claims[flask_app.config['JWT_IDENTITY_CLAIM']]
+        return await fn(request)
+    return wrapper
@@ -0,0 +1,222 @@
+from app.aio.decorators import jwt_required_async, json_response
+from app.models import Budget, Transaction
+from app.transactions import archive, search, stats
+from app.transactions.filters import InvalidCursor, build_query, encode_cursor, parse_date, seek_query
+from app.utils import rollups, spending
+from datetime import datetime
+from bson import ObjectId
+import asyncio
+
+async def _archived_before(request):
+    # archive.boundary() for the Motor handlers, which run outside Flask's g
+    if not request.app.state.flask_app.config['ARCHIVE_ENABLED']:
+        return None
+    state = await request.app.state.db.archive_state.find_one({'_id': archive.STATE_ID})
+    return state['archived_before'] if state else None
+
+async def _find_page(db, query, projection, sort, skip, limit, archived_before):
+    hot = await db.transactions.find(query, projection).sort(sort).skip(skip).limit(limit).to_list(limit)
+    if not archive.reaches_archive(query, archived_before) or archive.hot_page_suffices(hot, limit, archived_before):
+        return hot
+    return await db.transactions.aggregate(archive.page_pipeline(query, projection, sort, skip, limit)).to_list(limit)
+
+async def _count(db, query, archived_before):
+    total = await db.transactions.count_documents(query)
+    if archive.reaches_archive(query, archived_before):
+        results = await db.archived_transactions.aggregate(archive.count_pipeline(query)).to_list(1)
+        total += archive.archived_total(results)
+    return total
+
+async def _calculate_spent(request, user_id, budgets):
+    db = request.app.state.db
+
+    if not budgets:
+        return {}
+
+    if request.app.state.flask_app.config['USE_MONTHLY_ROLLUPS']:
+        query = rollups.rollup_query(user_id, **spending.rollup_filters(budgets))
+        results = await db.monthly_rollups.find(query, rollups.PROJECTION).to_list(None)
+        return spending.index_rollups(results)
+
+    pipeline = archive.with_archive(spending.build_spent_pipeline(user_id, budgets), await _archived_before(request))
+    return spending.index_spent(await db.transactions.aggregate(pipeline).to_list(None))
+
+@jwt_required_async
+async def get_transactions(request):
+    try:
+        user_id = request.state.user_id
+        db = request.app.state.db
+
+        # Query parameters
+        limit = int(request.query_params.get('limit', 20))
+        cursor = request.query_params.get('cursor')
+
+        query = build_query(user_id, request.query_params)
+        archived_before = await _archived_before(request)
+
+        # Cursor mode: seek on (date, _id) instead of skipping
+        if cursor is not None:
+            include_total = request.query_params.get('include_total', 'false') == 'true'
+
+            find = _find_page(db, seek_query(query, cursor) if cursor else query, Transaction.PROJECTION,
+                              [('date', -1), ('_id', -1)], 0, limit + 1, archived_before)
+
+            if include_total:
+                total, transactions = await asyncio.gather(_count(db, query, archived_before), find)
+            else:
+                transactions = await find
+
+            has_more = len(transactions) > limit
+            transactions = transactions[:limit]
+
+            response = {
+                'transactions': [Transaction.to_json(t) for t in transactions],
+                'next_cursor': encode_cursor(transactions[-1]) if has_more else None,
+                'has_more': has_more
+            }
+            if include_total:
+                response['total'] = total
+
+            return json_response(response)
+
+        page = int(request.query_params.get('page', 1))
+        include_total = request.query_params.get('include_total', 'true') == 'true'
+
+        # Searches rank by text score unless sort=date
+        projection = Transaction.PROJECTION
+        sort = [('date', -1), ('_id', -1)]
+        if search.is_relevance_sort(request.query_params):
+            projection = {**projection, 'score': {'$meta': 'textScore'}}
+            sort = search.relevance_sort()
+        
+        find = _find_page(db, query, projection, sort, (page - 1) * limit, limit, archived_before)
+
+        # Count and page run concurrently on the pool
+        if include_total:
+            total, transactions = await asyncio.gather(_count(db, query, archived_before), find)
+        else:
+            total, transactions = None, await find
+
+        return json_response({
+            'transactions': [Transaction.to_json(t) for t in transactions],
+            'total': total,
+            'page': page,
+            'pages': (total + limit - 1) // limit if include_total else None
+        })
+
+    except InvalidCursor as e:
+        return json_response({'error': str(e)}, 400)
+
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+@jwt_required_async
+async def get_stats(request):
+    try:
+        user_id = request.state.user_id
+        db = request.app.state.db
+
+        # Get date range
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+
+        if start_date:
+            start_date = parse_date(start_date)
+        if end_date:
+            end_date = parse_date(end_date)
+
+        detailed = request.query_params.get('detailed', 'false') == 'true'
+
+        # Whole-month ranges are answered from the rollup collection
+        months = None
+        if request.app.state.flask_app.config['USE_MONTHLY_ROLLUPS']:
+            months = rollups.whole_months(start_date, end_date)
+
+        if months is not None:
+            query = rollups.rollup_query(user_id, *months)
+            results = await db.monthly_rollups.find(query, rollups.PROJECTION).to_list(None)
+            rows = stats.rows_from_rollups(results)
+        else:
+            query = {'user_id': ObjectId(user_id)}
+
+            if start_date:
+                query['date'] = {'$gte': start_date}
+            if end_date:
+                query.setdefault('date', {})['$lte'] = end_date
+
+            pipeline = archive.with_archive(stats.build_pipeline(query), await _archived_before(request))
+            results = await db.transactions.aggregate(pipeline).to_list(None)
+            rows = stats.rows_from_pipeline(results)
+
+        return json_response(stats.summarize(rows, detailed))
+
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+@jwt_required_async
+async def get_budgets(request):
+    try:
+        user_id = request.state.user_id
+        db = request.app.state.db
+        month = request.query_params.get('month')  # Format: YYYY-MM
+
+        query = {'user_id': ObjectId(user_id)}
+        if month:
+            query['month'] = month
+
+        budgets = await db.budgets.find(query, Budget.PROJECTION).to_list(None)
+
+        # Calculate spent amount for all budgets at once
+        spent = await _calculate_spent(request, user_id, budgets)
+        result = [Budget.to_json(budget, spending.spent_for(spent, budget)) for budget in budgets]
+
+        return json_response({'budgets': result})
+
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+@jwt_required_async
+async def get_budget(request):
+    try:
+        user_id = request.state.user_id
+        db = request.app.state.db
+
+        budget = await db.budgets.find_one({
+            '_id': ObjectId(request.path_params['budget_id']),
+            'user_id': ObjectId(user_id)
+        })
+
+        if not budget:
+            return json_response({'error': 'Budget not found'}, 404)
+
+        # Calculate spent
+        spent = spending.spent_for(await _calculate_spent(request, user_id, [budget]), budget)
+
+        return json_response({'budget': Budget.to_json(budget, spent)})
+
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+@jwt_required_async
+async def get_budget_overview(request):
+    try:
+        user_id = request.state.user_id
+        db = request.app.state.db
+        month = request.query_params.get('month')  # Format: YYYY-MM
+
+        if not month:
+            # Use current month
+            month = datetime.now().strftime('%Y-%m')
+
+        # Get all budgets for the month
+        budgets = await db.budgets.find({
+            'user_id': ObjectId(user_id),
+            'month': month
+        }, Budget.PROJECTION).to_list(None)
+
+        spent = await _calculate_spent(request, user_id, budgets)
+
+        return json_response(spending.build_overview(month, budgets, spent))
+
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
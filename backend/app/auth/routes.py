@@ -1,12 +1,14 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token, get_jwt, get_jwt_identity
 from app import mongo
 from app.models import User, PasswordReset
 from app.utils.decorators import jwt_required_custom
-from app.utils.email import send_password_reset_email, send_sms, generate_reset_token
+from app.utils.email import password_reset_email, password_reset_sms, generate_reset_token
+from app.utils import outbox
+from app.utils.passwords import password_hasher, PasswordServiceBusy
+from app.utils.tokens import profile_claims, token_verifier
 from datetime import datetime, timedelta
 from bson import ObjectId
-import bcrypt
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -27,12 +29,12 @@ def register():
         user_data = User.create(data)
         result = mongo.db.users.insert_one(user_data)
         
+        user = mongo.db.users.find_one({'_id': result.inserted_id})
+        
         # Generate tokens
-        access_token = create_access_token(identity=str(result.inserted_id))
+        access_token = create_access_token(identity=str(result.inserted_id), additional_claims=profile_claims(user))
         refresh_token = create_refresh_token(identity=str(result.inserted_id))
         
-        user = mongo.db.users.find_one({'_id': result.inserted_id})
-        
         return jsonify({
             'message': 'User registered successfully',
             'access_token': access_token,
@@ -40,6 +42,9 @@ def register():
             'user': User.to_json(user)
         }), 201
     
+    except PasswordServiceBusy as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -61,8 +66,18 @@ def login():
         if not User.verify_password(user['password'], data['password']):
             return jsonify({'error': 'Invalid credentials'}), 401
         
+        # Upgrade hashes made with a different cost factor; skipped under load
+        if password_hasher.needs_rehash(user['password']):
+            try:
+                mongo.db.users.update_one(
+                    {'_id': user['_id']},
+                    {'$set': {'password': password_hasher.hash(data['password'])}}
+                )
+            except PasswordServiceBusy:
+                pass
+        
         # Generate tokens
-        access_token = create_access_token(identity=str(user['_id']))
+        access_token = create_access_token(identity=str(user['_id']), additional_claims=profile_claims(user))
         refresh_token = create_refresh_token(identity=str(user['_id']))
         
         return jsonify({
@@ -72,6 +87,9 @@ def login():
             'user': User.to_json(user)
         }), 200
     
+    except PasswordServiceBusy as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -79,6 +97,11 @@ def login():
 @jwt_required_custom
 def get_profile():
     try:
+        # Served from the token when it carries the profile
+        profile = get_jwt().get('profile')
+        if profile:
+            return jsonify({'user': profile}), 200
+        
         user_id = get_jwt_identity()
         user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
         
@@ -117,14 +140,36 @@ def update_profile():
         
         user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
         
+        # New access token so the profile claim matches the update
         return jsonify({
             'message': 'Profile updated successfully',
+            'access_token': create_access_token(identity=user_id, additional_claims=profile_claims(user)),
             'user': User.to_json(user)
         }), 200
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required_custom
+def logout():
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+        
+        token_verifier.revoke(get_jwt())
+        
+        # Revoke the refresh token too when the client sends it
+        if data.get('refresh_token'):
+            refresh = decode_token(data['refresh_token'])
+            if refresh.get('type') == 'refresh' and refresh[current_app.config['JWT_IDENTITY_CLAIM']] == user_id:
+                token_verifier.revoke(refresh)
+        
+        return jsonify({'message': 'Logged out successfully'}), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @auth_bp.route('/forgot-password', methods=['POST'])
 def forgot_password():
     try:
@@ -148,8 +193,8 @@ def forgot_password():
             reset_data['expires_at'] = datetime.utcnow() + timedelta(hours=1)
             mongo.db.password_resets.insert_one(reset_data)
             
-            # Send email
-            send_password_reset_email(email, token)
+            # Queue email
+            outbox.enqueue('email', password_reset_email(email, token))
             
             return jsonify({'message': 'Password reset link sent to email'}), 200
         
@@ -170,9 +215,8 @@ def forgot_password():
             reset_data['expires_at'] = datetime.utcnow() + timedelta(hours=1)
             mongo.db.password_resets.insert_one(reset_data)
             
-            # Send SMS
-            message = f"Your FinanceFlow password reset code: {token[:8]}"
-            send_sms(phone, message)
+            # Queue SMS
+            outbox.enqueue('sms', password_reset_sms(phone, token))
             
             return jsonify({'message': 'Password reset code sent via SMS'}), 200
         
@@ -202,7 +246,7 @@ def reset_password():
             return jsonify({'error': 'Invalid or expired token'}), 400
         
         # Hash new password
-        hashed_password = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
+        hashed_password = password_hasher.hash(new_password)
         
         # Update password
         mongo.db.users.update_one(
@@ -218,6 +262,9 @@ def reset_password():
         
         return jsonify({'message': 'Password reset successfully'}), 200
     
+    except PasswordServiceBusy as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -242,7 +289,7 @@ def change_password():
             return jsonify({'error': 'Current password is incorrect'}), 401
         
         # Hash new password
-        hashed_password = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
+        hashed_password = password_hasher.hash(new_password)
         
         # Update password
         mongo.db.users.update_one(
@@ -255,5 +302,8 @@ def change_password():
         
         return jsonify({'message': 'Password changed successfully'}), 200
     
+    except PasswordServiceBusy as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
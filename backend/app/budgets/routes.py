@@ -3,11 +3,18 @@ from flask_jwt_extended import get_jwt_identity
 from app import mongo
 from app.models import Budget
 from app.utils.decorators import jwt_required_custom
+from app.utils.spending import build_overview, calculate_spent, spent_for
+from app.utils.cache import bump_version, cached
+from app.utils.reads import db_for
+from app.utils import tombstones
 from datetime import datetime
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 budgets_bp = Blueprint('budgets', __name__)
 
+DUPLICATE_BUDGET = 'Budget already exists for this category and month'
+
 @budgets_bp.route('/', methods=['POST'])
 @jwt_required_custom
 def create_budget():
@@ -20,19 +27,10 @@ def create_budget():
         if not all(field in data for field in required):
             return jsonify({'error': 'Missing required fields'}), 400
         
-        # Check if budget already exists
-        existing = mongo.db.budgets.find_one({
-            'user_id': ObjectId(user_id),
-            'category': data['category'],
-            'month': data['month']
-        })
-        
-        if existing:
-            return jsonify({'error': 'Budget already exists for this category and month'}), 400
-        
-        # Create budget
+        # Create budget; the unique (user_id, month, category) index rejects duplicates
         budget_data = Budget.create(data, user_id)
         result = mongo.db.budgets.insert_one(budget_data)
+        bump_version(user_id)
         
         budget = mongo.db.budgets.find_one({'_id': result.inserted_id})
         
@@ -41,11 +39,15 @@ def create_budget():
             'budget': Budget.to_json(budget)
         }), 201
     
+    except DuplicateKeyError:
+        return jsonify({'error': DUPLICATE_BUDGET}), 400
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @budgets_bp.route('/', methods=['GET'])
 @jwt_required_custom
+@cached('budgets')
 def get_budgets():
     try:
         user_id = get_jwt_identity()
@@ -55,42 +57,11 @@ def get_budgets():
         if month:
             query['month'] = month
         
-        budgets = list(mongo.db.budgets.find(query))
+        budgets = list(mongo.db.budgets.find(query, Budget.PROJECTION))
         
-        # Calculate spent amount for each budget
-        result = []
-        for budget in budgets:
-            # Get spent amount
-            start_date = datetime.strptime(budget['month'], '%Y-%m')
-            if start_date.month == 12:
-                end_date = datetime(start_date.year + 1, 1, 1)
-            else:
-                end_date = datetime(start_date.year, start_date.month + 1, 1)
-            
-            spent_pipeline = [
-                {
-                    '$match': {
-                        'user_id': ObjectId(user_id),
-                        'category': budget['category'],
-                        'type': 'expense',
-                        'date': {
-                            '$gte': start_date,
-                            '$lt': end_date
-                        }
-                    }
-                },
-                {
-                    '$group': {
-                        '_id': None,
-                        'total': {'$sum': '$amount'}
-                    }
-                }
-            ]
-            
-            spent_result = list(mongo.db.transactions.aggregate(spent_pipeline))
-            spent = spent_result[0]['total'] if spent_result else 0
-            
-            result.append(Budget.to_json(budget, spent))
+        # Calculate spent amount for all budgets at once
+        spent = calculate_spent(user_id, budgets)
+        result = [Budget.to_json(budget, spent_for(spent, budget)) for budget in budgets]
         
         return jsonify({'budgets': result}), 200
     
@@ -112,34 +83,7 @@ def get_budget(budget_id):
             return jsonify({'error': 'Budget not found'}), 404
         
         # Calculate spent
-        start_date = datetime.strptime(budget['month'], '%Y-%m')
-        if start_date.month == 12:
-            end_date = datetime(start_date.year + 1, 1, 1)
-        else:
-            end_date = datetime(start_date.year, start_date.month + 1, 1)
-        
-        spent_pipeline = [
-            {
-                '$match': {
-                    'user_id': ObjectId(user_id),
-                    'category': budget['category'],
-                    'type': 'expense',
-                    'date': {
-                        '$gte': start_date,
-                        '$lt': end_date
-                    }
-                }
-            },
-            {
-                '$group': {
-                    '_id': None,
-                    'total': {'$sum': '$amount'}
-                }
-            }
-        ]
-        
-        spent_result = list(mongo.db.transactions.aggregate(spent_pipeline))
-        spent = spent_result[0]['total'] if spent_result else 0
+        spent = spent_for(calculate_spent(user_id, [budget]), budget)
         
         return jsonify({'budget': Budget.to_json(budget, spent)}), 200
     
@@ -175,44 +119,21 @@ def update_budget(budget_id):
             {'_id': ObjectId(budget_id)},
             {'$set': update_data}
         )
+        bump_version(user_id)
         
         budget = mongo.db.budgets.find_one({'_id': ObjectId(budget_id)})
         
         # Calculate spent
-        start_date = datetime.strptime(budget['month'], '%Y-%m')
-        if start_date.month == 12:
-            end_date = datetime(start_date.year + 1, 1, 1)
-        else:
-            end_date = datetime(start_date.year, start_date.month + 1, 1)
-        
-        spent_pipeline = [
-            {
-                '$match': {
-                    'user_id': ObjectId(user_id),
-                    'category': budget['category'],
-                    'type': 'expense',
-                    'date': {
-                        '$gte': start_date,
-                        '$lt': end_date
-                    }
-                }
-            },
-            {
-                '$group': {
-                    '_id': None,
-                    'total': {'$sum': '$amount'}
-                }
-            }
-        ]
-        
-        spent_result = list(mongo.db.transactions.aggregate(spent_pipeline))
-        spent = spent_result[0]['total'] if spent_result else 0
+        spent = spent_for(calculate_spent(user_id, [budget]), budget)
         
         return jsonify({
             'message': 'Budget updated successfully',
             'budget': Budget.to_json(budget, spent)
         }), 200
     
+    except DuplicateKeyError:
+        return jsonify({'error': DUPLICATE_BUDGET}), 400
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -230,6 +151,9 @@ def delete_budget(budget_id):
         if result.deleted_count == 0:
             return jsonify({'error': 'Budget not found'}), 404
         
+        tombstones.record('budgets', user_id, [{'_id': ObjectId(budget_id)}])
+        bump_version(user_id)
+        
         return jsonify({'message': 'Budget deleted successfully'}), 200
     
     except Exception as e:
@@ -237,6 +161,7 @@ def delete_budget(budget_id):
 
 @budgets_bp.route('/overview', methods=['GET'])
 @jwt_required_custom
+@cached('budget_overview')
 def get_budget_overview():
     try:
         user_id = get_jwt_identity()
@@ -247,59 +172,15 @@ def get_budget_overview():
             month = datetime.now().strftime('%Y-%m')
         
         # Get all budgets for the month
-        budgets = list(mongo.db.budgets.find({
+        db = db_for('budget_overview', user_id)
+        budgets = list(db.budgets.find({
             'user_id': ObjectId(user_id),
             'month': month
-        }))
+        }, Budget.PROJECTION))
         
-        total_budget = 0
-        total_spent = 0
-        categories = []
+        spent = calculate_spent(user_id, budgets, db)
         
-        start_date = datetime.strptime(month, '%Y-%m')
-        if start_date.month == 12:
-            end_date = datetime(start_date.year + 1, 1, 1)
-        else:
-            end_date = datetime(start_date.year, start_date.month + 1, 1)
-        
-        for budget in budgets:
-            total_budget += budget['limit']
-            
-            # Calculate spent
-            spent_pipeline = [
-                {
-                    '$match': {
-                        'user_id': ObjectId(user_id),
-                        'category': budget['category'],
-                        'type': 'expense',
-                        'date': {
-                            '$gte': start_date,
-                            '$lt': end_date
-                        }
-                    }
-                },
-                {
-                    '$group': {
-                        '_id': None,
-                        'total': {'$sum': '$amount'}
-                    }
-                }
-            ]
-            
-            spent_result = list(mongo.db.transactions.aggregate(spent_pipeline))
-            spent = spent_result[0]['total'] if spent_result else 0
-            total_spent += spent
-            
-            categories.append(Budget.to_json(budget, spent))
-        
-        return jsonify({
-            'month': month,
-            'total_budget': total_budget,
-            'total_spent': total_spent,
-            'remaining': total_budget - total_spent,
-            'percentage': (total_spent / total_budget * 100) if total_budget > 0 else 0,
-            'categories': categories
-        }), 200
+        return jsonify(build_overview(month, budgets, spent)), 200
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
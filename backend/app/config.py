@@ -10,12 +10,61 @@ class Config:
     
     # MongoDB
     MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/financeflow')
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 100))
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 0)) or None
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 0)) or None
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 10000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 0)) or None
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 30000))
+    MONGO_READ_PREFERENCE = os.getenv('MONGO_READ_PREFERENCE', 'primary')
+    MONGO_COMPRESSORS = os.getenv('MONGO_COMPRESSORS', '')  # e.g. 'zstd,snappy,zlib'
+    
+    # Read routing for analytics endpoints: stats, exports and budget
+    # aggregations can be served by secondaries within a staleness bound
+    ANALYTICS_READ_PREFERENCE = os.getenv('ANALYTICS_READ_PREFERENCE', 'secondaryPreferred')
+    ANALYTICS_MAX_STALENESS = int(os.getenv('ANALYTICS_MAX_STALENESS', 90))  # seconds, 90 minimum
+    ANALYTICS_READ_CONCERN = os.getenv('ANALYTICS_READ_CONCERN', 'local')
+    ANALYTICS_READS = {
+        'read_preference': ANALYTICS_READ_PREFERENCE,
+        'max_staleness': ANALYTICS_MAX_STALENESS,
+        'read_concern': ANALYTICS_READ_CONCERN
+    }
+    READ_ROUTING = {
+        'stats': ANALYTICS_READS,
+        'timeseries': ANALYTICS_READS,
+        'export': ANALYTICS_READS,
+        'budget_overview': ANALYTICS_READS
+    }
+    # Reads from a user who wrote within this window go to the primary
+    READ_YOUR_WRITES_WINDOW = int(os.getenv('READ_YOUR_WRITES_WINDOW', ANALYTICS_MAX_STALENESS))
+    
+    # Index builds run via `flask init-indexes`; this only logs drift at boot
+    CHECK_INDEXES_ON_STARTUP = os.getenv('CHECK_INDEXES_ON_STARTUP', 'False') == 'True'
+    
+    # Motor pool used by the ASGI app (asgi.py)
+    ASYNC_MONGO_MAX_POOL_SIZE = int(os.getenv('ASYNC_MONGO_MAX_POOL_SIZE', 100))
+    # Threads serving the Flask routes the ASGI app falls through to
+    ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', 32))
     
     # JWT
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     
+    # Token verification: verified tokens are cached until they expire and
+    # revocations are checked against an in-memory bloom filter
+    TOKEN_CACHE_MAX_ENTRIES = int(os.getenv('TOKEN_CACHE_MAX_ENTRIES', 10000))
+    REVOCATION_REFRESH_SECONDS = int(os.getenv('REVOCATION_REFRESH_SECONDS', 30))  # 0 checks Mongo every request
+    REVOCATION_FILTER_BITS = int(os.getenv('REVOCATION_FILTER_BITS', 1 << 20))
+    REVOCATION_FILTER_HASHES = int(os.getenv('REVOCATION_FILTER_HASHES', 4))
+    PROFILE_CLAIM_MAX_PICTURE = int(os.getenv('PROFILE_CLAIM_MAX_PICTURE', 512))  # longer pictures stay out of tokens
+    
+    # Password hashing
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', os.cpu_count() or 2))
+    BCRYPT_QUEUE_DEPTH = int(os.getenv('BCRYPT_QUEUE_DEPTH', 16))
+    
     # Email Configuration
     MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = int(os.getenv('MAIL_PORT', 587))
@@ -29,8 +78,66 @@ class Config:
     TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
     TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER')
     
+    # Outbound notifications (email/SMS are queued in the outbox collection)
+    MAIL_TRANSPORT = os.getenv('MAIL_TRANSPORT', 'smtp')  # 'smtp' or 'fake'
+    SMS_TRANSPORT = os.getenv('SMS_TRANSPORT', 'twilio')  # 'twilio' or 'fake'
+    OUTBOX_WORKER_THREADS = int(os.getenv('OUTBOX_WORKER_THREADS', 1))  # 0 when `flask outbox-worker` runs separately
+    OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 50))
+    OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', 2))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 5))
+    OUTBOX_RETRY_BACKOFF = int(os.getenv('OUTBOX_RETRY_BACKOFF', 30))
+    OUTBOX_LOCK_TIMEOUT = int(os.getenv('OUTBOX_LOCK_TIMEOUT', 300))
+    OUTBOX_RETENTION_DAYS = int(os.getenv('OUTBOX_RETENTION_DAYS', 7))  # sent and failed messages, then TTL-deleted
+    
+    # Live updates over /api/stream (change streams need a replica set)
+    STREAM_ENABLED = os.getenv('STREAM_ENABLED', 'True') == 'True'
+    STREAM_HEARTBEAT_SECONDS = int(os.getenv('STREAM_HEARTBEAT_SECONDS', 15))
+    STREAM_QUEUE_SIZE = int(os.getenv('STREAM_QUEUE_SIZE', 100))  # per connection, then the client is told to resync
+    STREAM_RETRY_SECONDS = int(os.getenv('STREAM_RETRY_SECONDS', 5))
+    STREAM_MAX_CONNECTIONS = int(os.getenv('STREAM_MAX_CONNECTIONS', 16))  # per process; each holds a request thread
+    STREAM_TICKET_SECONDS = int(os.getenv('STREAM_TICKET_SECONDS', 30))  # how long a ticket from POST /api/stream/ticket opens a stream
+    STREAM_PRE_IMAGES = os.getenv('STREAM_PRE_IMAGES', 'False') == 'True'  # MongoDB 6.0+ pre-images, needed to push deletes
+    
+    # Delta sync (/api/sync)
+    SYNC_TOMBSTONE_DAYS = int(os.getenv('SYNC_TOMBSTONE_DAYS', 30))  # older sync tokens get a full resync
+    SYNC_OVERLAP_SECONDS = int(os.getenv('SYNC_OVERLAP_SECONDS', 5))  # re-read window for writes still in flight
+    SYNC_MAX_CHANGES = int(os.getenv('SYNC_MAX_CHANGES', 1000))  # beyond this a full resync is cheaper
+    
+    # Archival: `flask archive-transactions` moves whole months older than the
+    # horizon into per-user-month buckets; list, export and stats read both tiers
+    ARCHIVE_ENABLED = os.getenv('ARCHIVE_ENABLED', 'False') == 'True'
+    ARCHIVE_HORIZON_DAYS = int(os.getenv('ARCHIVE_HORIZON_DAYS', 730))
+    ARCHIVE_BUCKET_SIZE = int(os.getenv('ARCHIVE_BUCKET_SIZE', 1000))  # transactions per bucket document
+    
     # CORS
     CORS_HEADERS = 'Content-Type'
     
+    # JSON encoder: 'auto' (orjson when installed), 'orjson', 'stdlib' or a dotted path
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'auto')
+    
     # Pagination
-    ITEMS_PER_PAGE = 20
\ No newline at end of file
+    ITEMS_PER_PAGE = 20
+    
+    # Stats
+    TIMESERIES_MAX_BUCKETS = int(os.getenv('TIMESERIES_MAX_BUCKETS', 1000))
+    
+    # Request profiling: cProfile a sample of requests and dump the slow ones
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))  # 0.0 - 1.0
+    PROFILE_SLOW_REQUEST_MS = int(os.getenv('PROFILE_SLOW_REQUEST_MS', 500))
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+    
+    # Response cache for dashboard reads
+    CACHE_ENABLED = os.getenv('CACHE_ENABLED', 'True') == 'True'
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+    CACHE_TTL = int(os.getenv('CACHE_TTL', 60))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 10000))
+    
+    # Export
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+    
+    # Bulk import
+    BULK_IMPORT_BATCH_SIZE = int(os.getenv('BULK_IMPORT_BATCH_SIZE', 1000))
+    BULK_IMPORT_MAX_ROWS = int(os.getenv('BULK_IMPORT_MAX_ROWS', 100000))
+    
+    # Serve stats and budget spent from monthly_rollups (run `flask rebuild-rollups` first)
+    USE_MONTHLY_ROLLUPS = os.getenv('USE_MONTHLY_ROLLUPS', 'False') == 'True'
\ No newline at end of file
@@ -0,0 +1,37 @@
+from flask import Blueprint, Response, jsonify, current_app, request
+from app import mongo
+from app.utils.monitoring import command_metrics, pool_metrics, prometheus_text, request_metrics
+import time
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('/health', methods=['GET'])
+def health():
+    try:
+        started = time.perf_counter()
+        mongo.cx.admin.command('ping')
+        latency = (time.perf_counter() - started) * 1000
+        
+        return jsonify({
+            'status': 'ok',
+            'mongo': {'ok': True, 'latency_ms': latency},
+            'pool': pool_metrics.snapshot()
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'status': 'error', 'mongo': {'ok': False, 'error': str(e)}}), 503
+
+@health_bp.route('/metrics', methods=['GET'])
+def metrics():
+    if request.args.get('format') != 'json':
+        return Response(prometheus_text(), mimetype='text/plain; version=0.0.4')
+    
+    return jsonify({
+        'pool': {
+            **pool_metrics.snapshot(),
+            'max_pool_size': current_app.config['MONGO_MAX_POOL_SIZE'],
+            'min_pool_size': current_app.config['MONGO_MIN_POOL_SIZE']
+        },
+        'commands': command_metrics.snapshot(),
+        'requests': request_metrics.snapshot()
+    }), 200
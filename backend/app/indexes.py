@@ -0,0 +1,151 @@
+from app import mongo
+from flask.cli import with_appcontext
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+import click
+
+# Every index the app relies on, declared once per collection
+INDEXES = {
+    'users': [
+        IndexModel([('email', ASCENDING)], unique=True)
+    ],
+    'transactions': [
+        IndexModel([('user_id', ASCENDING), ('date', DESCENDING), ('_id', DESCENDING)]),
+        # category/type filters on the list, export and budget spend queries
+        IndexModel([
+            ('user_id', ASCENDING), ('category', ASCENDING), ('type', ASCENDING),
+            ('date', DESCENDING), ('_id', DESCENDING)
+        ]),
+        IndexModel(
+            [('user_id', ASCENDING), ('import_hash', ASCENDING)],
+            unique=True,
+            partialFilterExpression={'import_hash': {'$exists': True}}
+        ),
+        # /api/sync: rows changed since a token
+        IndexModel([('user_id', ASCENDING), ('updated_at', ASCENDING)]),
+        # Rows an interrupted archive run left marked
+        IndexModel([('archiving', ASCENDING)], sparse=True),
+        # q= search; user_id prefix keeps each search inside one user's entries
+        IndexModel(
+            [('user_id', ASCENDING), ('description', TEXT), ('category', TEXT)],
+            weights={'category': 5, 'description': 1},
+            default_language='none',
+            name='transactions_search'
+        )
+    ],
+    'archived_transactions': [
+        IndexModel([('user_id', ASCENDING), ('start', DESCENDING)])
+    ],
+    'search_terms': [
+        IndexModel([('user_id', ASCENDING), ('field', ASCENDING), ('term', ASCENDING)], unique=True)
+    ],
+    'budgets': [
+        # One budget per category and month; month first so the overview
+        # and ?month= lists use it too
+        IndexModel([('user_id', ASCENDING), ('month', ASCENDING), ('category', ASCENDING)], unique=True),
+        IndexModel([('user_id', ASCENDING), ('updated_at', ASCENDING)])
+    ],
+    'tombstones': [
+        IndexModel([('user_id', ASCENDING), ('deleted_at', ASCENDING)]),
+        IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0)
+    ],
+    'monthly_rollups': [
+        IndexModel(
+            [('user_id', ASCENDING), ('month', ASCENDING), ('category', ASCENDING), ('type', ASCENDING)],
+            unique=True
+        )
+    ],
+    'token_blocklist': [
+        IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0)
+    ],
+    'password_resets': [
+        IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0)
+    ],
+    'outbox': [
+        IndexModel([('kind', ASCENDING), ('status', ASCENDING), ('next_attempt_at', ASCENDING)]),
+        # Sent and failed messages expire after OUTBOX_RETENTION_DAYS
+        IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0)
+    ]
+}
+
+# Options that change what an index enforces; others are cosmetic
+COMPARED_OPTIONS = ('unique', 'sparse', 'partialFilterExpression', 'expireAfterSeconds', 'weights', 'default_language')
+
+def _key(index):
+    # Text indexes are listed as _fts/_ftsx plus weights, not the declared fields
+    key = [(k, v if v == 'text' else int(v)) for k, v in index['key'].items() if k not in ('_fts', '_ftsx')]
+    if '_fts' in index['key']:
+        key += [(field, 'text') for field in index.get('weights', {})]
+    return sorted(k for k in key if k[1] == 'text') + [k for k in key if k[1] != 'text']
+
+def _same_index(declared, existing):
+    if _key(declared) != _key(existing):
+        return False
+    return all(declared.get(option) == existing.get(option) for option in COMPARED_OPTIONS)
+
+def diff_indexes():
+    # Compare the manifest with list_indexes: (missing, changed, unknown)
+    missing, changed, unknown = [], [], []
+    for collection, models in INDEXES.items():
+        existing = {index['name']: index for index in mongo.db[collection].list_indexes()}
+        for model in models:
+            declared = model.document
+            current = existing.pop(declared['name'], None)
+            if current is None:
+                missing.append((collection, model))
+            elif not _same_index(declared, current):
+                changed.append((collection, model))
+        unknown.extend((collection, name) for name in existing if name != '_id_')
+    return missing, changed, unknown
+
+def check_indexes(app):
+    # Opt-in startup check: report drift, never build indexes while booting
+    with app.app_context():
+        try:
+            missing, changed, _ = diff_indexes()
+        except Exception as e:
+            app.logger.warning(f'Could not check indexes: {e}')
+            return
+        for collection, model in missing:
+            app.logger.warning(f"Missing index {collection}.{model.document['name']}, run `flask init-indexes`")
+        for collection, model in changed:
+            app.logger.warning(f"Index {collection}.{model.document['name']} differs from the manifest")
+
+@click.command('init-indexes')
+@click.option('--dry-run', is_flag=True, help='Only report differences.')
+@click.option('--recreate', is_flag=True, help='Drop and rebuild indexes whose options changed.')
+@with_appcontext
+def init_indexes_command(dry_run, recreate):
+    """Create the indexes declared in app/indexes.py."""
+    missing, changed, unknown = diff_indexes()
+
+    for collection, name in unknown:
+        click.echo(f'Not in manifest: {collection}.{name}')
+    for collection, model in changed:
+        click.echo(f"Changed: {collection}.{model.document['name']}")
+    for collection, model in missing:
+        click.echo(f"Missing: {collection}.{model.document['name']}")
+
+    if dry_run:
+        return
+
+    if recreate:
+        for collection, model in changed:
+            mongo.db[collection].drop_index(model.document['name'])
+        missing = missing + changed
+    elif changed:
+        click.echo('Skipping changed indexes, pass --recreate to rebuild them')
+
+    by_collection = {}
+    for collection, model in missing:
+        by_collection.setdefault(collection, []).append(model)
+    created = 0
+    for collection, models in by_collection.items():
+        try:
+            mongo.db[collection].create_indexes(models)
+            created += len(models)
+        except OperationFailure as e:
+            # e.g. a unique index over existing duplicates
+            click.echo(f'Could not create indexes on {collection}: {e}', err=True)
+
+    click.echo(f'Created {created} indexes')
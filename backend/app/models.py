@@ -1,13 +1,20 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from bson import ObjectId
-import bcrypt
+from app.utils.passwords import password_hasher
+
+def parse_datetime(value):
+    # Store naive UTC, the same way PyMongo hands dates back
+    date = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date
 
 class User:
     @staticmethod
     def create(data):
         return {
             'email': data['email'],
-            'password': bcrypt.hashpw(data['password'].encode('utf-8'), bcrypt.gensalt()),
+            'password': password_hasher.hash(data['password']),
             'name': data.get('name', ''),
             'phone': data.get('phone', ''),
             'profile_picture': data.get('profile_picture', ''),
@@ -17,7 +24,7 @@ class User:
     
     @staticmethod
     def verify_password(stored_password, provided_password):
-        return bcrypt.checkpw(provided_password.encode('utf-8'), stored_password)
+        return password_hasher.verify(stored_password, provided_password)
     
     @staticmethod
     def to_json(user):
@@ -31,6 +38,23 @@ class User:
         }
 
 class Transaction:
+    # Fields to_json reads; list endpoints fetch only these
+    PROJECTION = {'amount': 1, 'category': 1, 'type': 1, 'description': 1, 'date': 1, 'created_at': 1}
+    
+    @staticmethod
+    def validate(data):
+        required = ['amount', 'category', 'type', 'date']
+        if not all(field in data for field in required):
+            return 'Missing required fields'
+        
+        if data['type'] not in ['income', 'expense']:
+            return 'Type must be income or expense'
+        
+        if not isinstance(data['category'], str) or not isinstance(data.get('description', ''), str):
+            return 'Category and description must be text'
+        
+        return None
+    
     @staticmethod
     def create(data, user_id):
         return {
@@ -39,24 +63,29 @@ class Transaction:
             'category': data['category'],
             'type': data['type'],  # 'income' or 'expense'
             'description': data.get('description', ''),
-            'date': datetime.fromisoformat(data['date'].replace('Z', '+00:00')),
+            'date': parse_datetime(data['date']),
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow()
         }
     
     @staticmethod
     def to_json(transaction):
+        # The app's JSON provider renders ObjectId and datetime, so hot list
+        # pages skip a str()/isoformat() per field
         return {
-            'id': str(transaction['_id']),
+            'id': transaction['_id'],
             'amount': transaction['amount'],
             'category': transaction['category'],
             'type': transaction['type'],
             'description': transaction.get('description', ''),
-            'date': transaction['date'].isoformat(),
-            'created_at': transaction['created_at'].isoformat()
+            'date': transaction['date'],
+            'created_at': transaction['created_at']
         }
 
 class Budget:
+    # Fields to_json and the spent calculation read
+    PROJECTION = {'category': 1, 'limit': 1, 'month': 1}
+    
     @staticmethod
     def create(data, user_id):
         return {
@@ -0,0 +1,125 @@
+from app import mongo
+from app.transactions import archive, search, stats, timeseries
+from app.sync.changes import changed_query, deleted_query
+from app.transactions.filters import build_query, encode_cursor, seek_query
+from app.utils import rollups
+from app.utils.outbox import claim_query
+from app.utils.spending import build_spent_pipeline
+from collections import namedtuple
+from datetime import datetime, timedelta
+from bson import ObjectId
+from flask.cli import with_appcontext
+import click
+
+# A query a route issues: find shapes carry filter and sort, aggregate shapes a
+# pipeline. `allowed` lists flagged stages that are expected for the shape.
+Shape = namedtuple('Shape', 'name collection filter sort pipeline allowed', defaults=(None, None, None, ()))
+
+FLAGGED_STAGES = ('COLLSCAN', 'SORT')
+SKIPPED_KEYS = ('rejectedPlans', 'allPlansExecution')
+
+NEWEST_FIRST = [('date', -1), ('_id', -1)]
+
+def shapes(user_id, category, date):
+    # Built with the same helpers the routes use, so the shapes cannot drift
+    uid = str(user_id)
+    month = rollups.month_key(date)
+    start_date = (date - timedelta(days=90)).isoformat()
+    end_date = date.isoformat()
+    cursor = encode_cursor({'date': date, '_id': ObjectId()})
+    budgets = [{'category': category, 'month': month}]
+    since = datetime.utcnow() - timedelta(hours=1)
+
+    return [
+        Shape('transactions.list', 'transactions', build_query(uid, {}), NEWEST_FIRST),
+        Shape('transactions.list cursor', 'transactions', seek_query(build_query(uid, {}), cursor), NEWEST_FIRST),
+        Shape('transactions.list category', 'transactions', build_query(uid, {'category': category}), NEWEST_FIRST),
+        Shape('transactions.list type', 'transactions', build_query(uid, {'type': 'expense'}), NEWEST_FIRST),
+        Shape(
+            'transactions.list category+type+range', 'transactions',
+            build_query(uid, {'category': category, 'type': 'expense', 'start_date': start_date, 'end_date': end_date}),
+            NEWEST_FIRST
+        ),
+        # textScore ordering is always computed in memory
+        Shape('transactions.search', 'transactions', build_query(uid, {'q': category}), search.relevance_sort(), allowed=('SORT',)),
+        Shape('transactions.suggest', 'search_terms', search.suggest_query(uid, category[:2], 'category'), [('count', -1)], allowed=('SORT',)),
+        Shape('transactions.stats', 'transactions', pipeline=stats.build_pipeline(
+            build_query(uid, {'start_date': start_date, 'end_date': end_date})
+        )),
+        Shape('transactions.timeseries', 'transactions', pipeline=timeseries.build_pipeline(
+            build_query(uid, {'category': category, 'start_date': start_date}), 'month', 'type'
+        )),
+        Shape('archive.buckets', 'archived_transactions', archive.bucket_match(build_query(uid, {'start_date': start_date}))),
+        Shape('budgets.list', 'budgets', {'user_id': ObjectId(uid)}),
+        Shape('budgets.overview', 'budgets', {'user_id': ObjectId(uid), 'month': month}),
+        Shape('budgets.spent', 'transactions', pipeline=build_spent_pipeline(uid, budgets)),
+        Shape('monthly_rollups', 'monthly_rollups', rollups.rollup_query(uid, month, month, type='expense', category={'$in': [category]})),
+        Shape('sync.transactions', 'transactions', changed_query(uid, since), [('updated_at', 1)]),
+        Shape('sync.budgets', 'budgets', changed_query(uid, since), [('updated_at', 1)]),
+        Shape('sync.tombstones', 'tombstones', deleted_query(uid, since), [('deleted_at', 1)]),
+        Shape('auth.login', 'users', {'email': 'someone@example.com'}),
+        Shape('token_blocklist', 'token_blocklist', {'_id': 'jti'}),
+        Shape('outbox.claim', 'outbox', claim_query('email', datetime.utcnow(), timedelta(minutes=5)), [('next_attempt_at', 1)])
+    ]
+
+def explain(shape):
+    if shape.pipeline is not None:
+        return mongo.db.command('aggregate', shape.collection, pipeline=shape.pipeline, explain=True)
+
+    cursor = mongo.db[shape.collection].find(shape.filter)
+    if shape.sort:
+        cursor = cursor.sort(shape.sort)
+    return cursor.limit(20).explain()
+
+def plan_stages(node, stages=None, indexes=None):
+    # Stage and index names in the winning plan, wherever the explain nests it
+    # (queryPlanner, $cursor stages, shards)
+    stages = [] if stages is None else stages
+    indexes = [] if indexes is None else indexes
+
+    if isinstance(node, dict):
+        if isinstance(node.get('stage'), str):
+            stages.append(node['stage'].upper())
+        if isinstance(node.get('indexName'), str) and node['indexName'] not in indexes:
+            indexes.append(node['indexName'])
+        for key, value in node.items():
+            if key not in SKIPPED_KEYS:
+                plan_stages(value, stages, indexes)
+    elif isinstance(node, list):
+        for value in node:
+            plan_stages(value, stages, indexes)
+
+    return stages, indexes
+
+def _sample(user_id):
+    # A user with data gives the planner realistic statistics
+    if user_id:
+        transaction = mongo.db.transactions.find_one({'user_id': ObjectId(user_id)}, {'category': 1, 'date': 1})
+    else:
+        transaction = mongo.db.transactions.find_one({}, {'user_id': 1, 'category': 1, 'date': 1})
+
+    if not transaction:
+        return ObjectId(user_id) if user_id else ObjectId(), 'Food', datetime.utcnow()
+    return transaction.get('user_id', ObjectId(user_id) if user_id else None), transaction['category'], transaction['date']
+
+@click.command('explain-queries')
+@click.option('--user-id', default=None, help='Explain against this user (default: any user with transactions).')
+@with_appcontext
+def explain_queries_command(user_id):
+    """Explain every route's query shape and flag collection scans and in-memory sorts."""
+    flagged = 0
+    for shape in shapes(*_sample(user_id)):
+        try:
+            stages, indexes = plan_stages(explain(shape))
+        except Exception as e:
+            click.echo(f'{"ERROR":<9} {shape.name:<40} {e}')
+            flagged += 1
+            continue
+
+        problems = [stage for stage in FLAGGED_STAGES if stage in stages and stage not in shape.allowed]
+        status = ','.join(problems) if problems else 'ok'
+        click.echo(f'{status:<9} {shape.name:<40} {", ".join(indexes) or "-"}')
+        flagged += bool(problems)
+
+    if flagged:
+        raise SystemExit(f'{flagged} query shapes need attention, see app/indexes.py')
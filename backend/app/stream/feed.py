@@ -0,0 +1,190 @@
+from app import mongo
+from app.models import Budget, Transaction
+from app.transactions import archive
+from app.utils.rollups import month_key
+from app.utils.serialization import dumps
+from app.utils.spending import calculate_spent, spent_for
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+import queue
+import threading
+
+# Tombstones name the months deleted or moved transactions left
+WATCHED = ('transactions', 'budgets', 'tombstones')
+OPERATIONS = {'insert': 'created', 'update': 'updated', 'replace': 'updated', 'delete': 'deleted'}
+MAX_BATCH = 500
+
+def frame(event, data):
+    # One Server-Sent Events message, encoded once and shared by every subscriber
+    return b'event: ' + event.encode('ascii') + b'\ndata: ' + dumps(data) + b'\n\n'
+
+# Tells a client it may have missed events and should refetch
+RESYNC = frame('resync', {})
+
+class ChangeFeed:
+    # One change stream per process, fanned out to each user's open SSE
+    # connections. The reader starts with the first subscriber and stops when
+    # the last one leaves.
+    def __init__(self):
+        self.app = None
+        self.queue_size = 100
+        self.max_connections = 16
+        self.retry_seconds = 5
+        self.pre_images = False
+        self.resume_token = None
+        self._subscribers = {}
+        self._connections = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def init_app(self, app):
+        self.app = app
+        self.queue_size = app.config['STREAM_QUEUE_SIZE']
+        self.max_connections = app.config['STREAM_MAX_CONNECTIONS']
+        self.retry_seconds = app.config['STREAM_RETRY_SECONDS']
+        self.pre_images = app.config['STREAM_PRE_IMAGES']
+        app.extensions['change_feed'] = self
+
+    def subscribe(self, user_id):
+        # None once this process serves max_connections streams
+        subscription = queue.Queue(self.queue_size)
+        with self._lock:
+            if self._connections >= self.max_connections:
+                return None
+            self._connections += 1
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self.run, name='change-feed', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(user_id)
+            if subscriptions and subscription in subscriptions:
+                self._connections -= 1
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[user_id]
+
+    def stop(self):
+        self._stop.set()
+
+    def publish(self, user_id, message):
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+
+        for subscription in subscriptions:
+            try:
+                subscription.put_nowait(message)
+            except queue.Full:
+                # A client that stopped reading gets its backlog replaced by a resync
+                with subscription.mutex:
+                    subscription.queue.clear()
+                subscription.put_nowait(RESYNC)
+
+    def broadcast(self, message):
+        with self._lock:
+            user_ids = list(self._subscribers)
+        for user_id in user_ids:
+            self.publish(user_id, message)
+
+    def _idle(self):
+        # Checked under the lock so a new subscriber either sees the thread
+        # still running or starts a new one
+        with self._lock:
+            if self._subscribers and not self._stop.is_set():
+                return False
+            self._thread = None
+            self.resume_token = None
+            return True
+
+    def run(self):
+        with self.app.app_context():
+            while not self._idle():
+                try:
+                    self._watch()
+                except OperationFailure as e:
+                    # e.g. the resume point fell off the oplog: start over
+                    self.app.logger.warning(f'Change stream failed: {e}')
+                    self.resume_token = None
+                    self.broadcast(RESYNC)
+                    self._stop.wait(self.retry_seconds)
+                except Exception as e:
+                    self.app.logger.warning(f'Change stream unavailable: {e}')
+                    self._stop.wait(self.retry_seconds)
+
+    def _watch(self):
+        pipeline = [{'$match': {
+            'ns.coll': {'$in': list(WATCHED)},
+            'operationType': {'$in': list(OPERATIONS)}
+        }}]
+        options = {'full_document': 'updateLookup', 'max_await_time_ms': 1000}
+        if self.pre_images:
+            options['full_document_before_change'] = 'whenAvailable'
+
+        with mongo.db.watch(pipeline, resume_after=self.resume_token, **options) as stream:
+            while stream.alive:
+                with self._lock:
+                    if not self._subscribers or self._stop.is_set():
+                        return
+
+                # Drain what is ready so bursts (bulk imports) recompute budgets once
+                batch = []
+                change = stream.try_next()
+                while change is not None:
+                    batch.append(change)
+                    if len(batch) >= MAX_BATCH:
+                        break
+                    change = stream.try_next()
+
+                self.resume_token = stream.resume_token
+                if batch:
+                    # A fresh context per batch: per-request caches on g (the
+                    # archive boundary) must not outlive a later archive run
+                    with self.app.app_context():
+                        self.dispatch(batch)
+
+    def dispatch(self, changes):
+        with self._lock:
+            subscribed = set(self._subscribers)
+
+        months = {}
+        for change in changes:
+            # Deletes carry only the _id unless pre-images are enabled
+            doc = change.get('fullDocument') or change.get('fullDocumentBeforeChange')
+            if doc is None or str(doc['user_id']) not in subscribed:
+                continue
+            # Rows being moved to the archive have not changed for the user
+            if archive.MARKER in doc:
+                continue
+
+            user_id = str(doc['user_id'])
+            operation = OPERATIONS[change['operationType']]
+
+            if change['ns']['coll'] == 'tombstones':
+                if operation == 'created' and doc.get('month'):
+                    months.setdefault(user_id, set()).add(doc['month'])
+            elif change['ns']['coll'] == 'transactions':
+                transaction = {'id': doc['_id']} if operation == 'deleted' else Transaction.to_json(doc)
+                self.publish(user_id, frame('transaction', {'op': operation, 'transaction': transaction}))
+                # Any type: a type change moves spent too
+                months.setdefault(user_id, set()).add(month_key(doc['date']))
+            elif operation == 'deleted':
+                self.publish(user_id, frame('budget', {'op': operation, 'budget': {'id': str(doc['_id'])}}))
+            else:
+                months.setdefault(user_id, set()).add(doc['month'])
+
+        # Spent is recomputed per affected month, covering category changes too
+        for user_id, user_months in months.items():
+            budgets = list(mongo.db.budgets.find(
+                {'user_id': ObjectId(user_id), 'month': {'$in': sorted(user_months)}},
+                Budget.PROJECTION
+            ))
+            spent = calculate_spent(user_id, budgets)
+            for budget in budgets:
+                self.publish(user_id, frame('budget', {'op': 'updated', 'budget': Budget.to_json(budget, spent_for(spent, budget))}))
+
+change_feed = ChangeFeed()
@@ -0,0 +1,74 @@
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from flask_jwt_extended import get_jwt
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from app.stream.feed import change_feed, frame
+from app.utils.decorators import jwt_required_custom
+from app.utils.tokens import bearer_token, token_verifier
+import queue
+import time
+
+stream_bp = Blueprint('stream', __name__)
+
+def _tickets():
+    return URLSafeTimedSerializer(current_app.config['JWT_SECRET_KEY'], salt='stream-ticket')
+
+@stream_bp.route('/stream/ticket', methods=['POST'])
+@jwt_required_custom
+def stream_ticket():
+    # EventSource cannot send headers and the access token carries the profile,
+    # so browsers open the stream with a short-lived ticket in the URL instead
+    claims = get_jwt()
+    ticket = _tickets().dumps({
+        'sub': claims[current_app.config['JWT_IDENTITY_CLAIM']],
+        'jti': claims['jti'],
+        'exp': claims['exp']
+    })
+    return jsonify({'ticket': ticket, 'expires_in': current_app.config['STREAM_TICKET_SECONDS']}), 200
+
+def _stream_claims():
+    header = request.headers.get('Authorization')
+    if header:
+        claims = token_verifier.verify(bearer_token(header))
+        return claims[current_app.config['JWT_IDENTITY_CLAIM']], claims
+
+    claims = _tickets().loads(request.args.get('ticket', ''), max_age=current_app.config['STREAM_TICKET_SECONDS'])
+    if token_verifier.is_revoked(claims['jti']):
+        raise BadSignature('Token has been revoked')
+    return claims['sub'], claims
+
+@stream_bp.route('/stream', methods=['GET'])
+def stream():
+    if not current_app.config['STREAM_ENABLED']:
+        return jsonify({'error': 'Live updates are disabled'}), 503
+
+    try:
+        user_id, claims = _stream_claims()
+    except Exception as e:
+        return jsonify({'error': 'Invalid or expired token'}), 401
+
+    heartbeat = current_app.config['STREAM_HEARTBEAT_SECONDS']
+    # Each connection holds a request thread, so a process serves a bounded number
+    subscription = change_feed.subscribe(user_id)
+    if subscription is None:
+        return jsonify({'error': 'Too many live connections, retry later'}), 503
+
+    def events():
+        try:
+            yield frame('ready', {})
+            # Runs until the token expires or is revoked; clients reconnect with a fresh ticket
+            while time.time() < claims['exp']:
+                try:
+                    yield subscription.get(timeout=heartbeat)
+                except queue.Empty:
+                    if token_verifier.is_revoked(claims['jti']):
+                        break
+                    yield b': ping\n\n'
+            yield frame('expired', {})
+        finally:
+            change_feed.unsubscribe(user_id, subscription)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -0,0 +1,25 @@
+from datetime import datetime
+from bson import ObjectId
+import base64
+import json
+
+class InvalidSyncToken(ValueError):
+    pass
+
+def encode_token(moment):
+    payload = json.dumps([moment.isoformat()])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_token(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        moment, = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(moment)
+    except Exception:
+        raise InvalidSyncToken('Invalid sync token')
+
+def changed_query(user_id, after):
+    return {'user_id': ObjectId(user_id), 'updated_at': {'$gt': after}}
+
+def deleted_query(user_id, after):
+    return {'user_id': ObjectId(user_id), 'deleted_at': {'$gt': after}}
@@ -0,0 +1,84 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import get_jwt_identity
+from app import mongo
+from app.models import Budget, Transaction
+from app.sync.changes import InvalidSyncToken, changed_query, decode_token, deleted_query, encode_token
+from app.utils.decorators import jwt_required_custom
+from app.utils.rollups import month_key
+from app.utils.spending import calculate_spent, spent_for
+from datetime import datetime, timedelta
+from bson import ObjectId
+
+sync_bp = Blueprint('sync', __name__)
+
+def _full_resync(token):
+    # The client reloads through the regular endpoints, then syncs from token
+    return jsonify({'full_resync': True, 'token': token}), 200
+
+@sync_bp.route('/sync', methods=['GET'])
+@jwt_required_custom
+def sync():
+    try:
+        user_id = get_jwt_identity()
+        
+        # Taken before reading so nothing written during the read is skipped next time
+        now = datetime.utcnow()
+        token = encode_token(now)
+        
+        since = request.args.get('since')
+        if not since:
+            return _full_resync(token)
+        
+        since = decode_token(since)
+        if since < now - timedelta(days=current_app.config['SYNC_TOMBSTONE_DAYS']):
+            # Tombstones for deletes before this may already be gone
+            return _full_resync(token)
+        
+        # Re-read a short window so writes that were in flight at `since` are not missed;
+        # clients apply changes by id, so repeats are harmless
+        after = since - timedelta(seconds=current_app.config['SYNC_OVERLAP_SECONDS'])
+        limit = current_app.config['SYNC_MAX_CHANGES']
+        
+        transactions = list(mongo.db.transactions.find(changed_query(user_id, after), Transaction.PROJECTION)
+                            .sort('updated_at', 1)
+                            .limit(limit + 1))
+        budgets = list(mongo.db.budgets.find(changed_query(user_id, after), Budget.PROJECTION)
+                       .sort('updated_at', 1)
+                       .limit(limit + 1))
+        deleted = list(mongo.db.tombstones.find(deleted_query(user_id, after), {'collection': 1, 'doc_id': 1, 'month': 1})
+                       .sort('deleted_at', 1)
+                       .limit(limit + 1))
+        
+        if any(len(rows) > limit for rows in (transactions, budgets, deleted)):
+            return _full_resync(token)
+        
+        # Spent changes with transactions, so budgets in months they touched are resent
+        # too: where changed rows are now (any type, a type change moves spent) and
+        # the months deleted or moved rows left, from their tombstones
+        months = {month_key(t['date']) for t in transactions}
+        months.update(d['month'] for d in deleted if d.get('month'))
+        if months:
+            changed = {b['_id'] for b in budgets}
+            budgets += [
+                b for b in mongo.db.budgets.find({'user_id': ObjectId(user_id), 'month': {'$in': sorted(months)}}, Budget.PROJECTION)
+                if b['_id'] not in changed
+            ]
+        
+        spent = calculate_spent(user_id, budgets)
+        
+        return jsonify({
+            'full_resync': False,
+            'token': token,
+            'transactions': [Transaction.to_json(t) for t in transactions],
+            'budgets': [Budget.to_json(b, spent_for(spent, b)) for b in budgets],
+            'deleted': {
+                'transactions': [d['doc_id'] for d in deleted if d['collection'] == 'transactions'],
+                'budgets': [d['doc_id'] for d in deleted if d['collection'] == 'budgets']
+            }
+        }), 200
+    
+    except InvalidSyncToken as e:
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,255 @@
+from app import mongo
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from flask import current_app, g
+from flask.cli import with_appcontext
+from pymongo.errors import DuplicateKeyError
+import click
+
+# Transactions older than the horizon live in archived_transactions as one
+# document per user and month (several when a month exceeds the bucket size).
+# Every archived transaction is dated before archive_state.archived_before, so
+# reads only consult the archive when their range reaches below it.
+STATE_ID = 'transactions'
+MARKER = 'archiving'
+
+def boundary():
+    # None while archiving is off or nothing has been archived yet
+    if not current_app.config['ARCHIVE_ENABLED']:
+        return None
+    if 'archived_before' not in g:
+        state = mongo.db.archive_state.find_one({'_id': STATE_ID})
+        g.archived_before = state['archived_before'] if state else None
+    return g.archived_before
+
+def _conditions(query):
+    # Top-level conditions of a route query, including seek_query's $and
+    return query['$and'][0] if '$and' in query else query
+
+def _naive_utc(date):
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date
+
+def reaches_archive(query, archived_before):
+    if archived_before is None:
+        return False
+    conditions = _conditions(query)
+    # Text search needs the text index, so it covers the hot tier only
+    if '$text' in conditions:
+        return False
+    start = conditions.get('date', {}).get('$gte')
+    if start is None:
+        return True
+    return _naive_utc(start) < archived_before
+
+def bucket_match(query):
+    # Narrow to the user's buckets overlapping the requested date range
+    conditions = _conditions(query)
+    match = {}
+    if 'user_id' in conditions:
+        match['user_id'] = conditions['user_id']
+    date = conditions.get('date', {})
+    if '$gte' in date:
+        match['end'] = {'$gt': date['$gte']}
+    if '$lte' in date:
+        match['start'] = {'$lte': date['$lte']}
+    return match
+
+def unwound(query):
+    # Archived transactions as ordinary transaction documents
+    return [
+        {'$match': bucket_match(query)},
+        {'$unwind': '$transactions'},
+        {'$replaceRoot': {'newRoot': {'$mergeObjects': ['$transactions', {'user_id': '$user_id'}]}}},
+        {'$match': query}
+    ]
+
+def union(query, *stages):
+    return {'$unionWith': {'coll': 'archived_transactions', 'pipeline': unwound(query) + list(stages)}}
+
+def with_archive(pipeline, archived_before):
+    # Pipelines that start with $match read both tiers when the range needs it
+    query = pipeline[0]['$match']
+    if not reaches_archive(query, archived_before):
+        return pipeline
+    return [pipeline[0], union(query)] + pipeline[1:]
+
+def page_pipeline(query, projection, sort, skip, limit):
+    # Each tier contributes at most skip + limit rows before the merge
+    window = [{'$sort': dict(sort)}, {'$limit': skip + limit}]
+    return [
+        {'$match': query},
+        *window,
+        union(query, *window),
+        {'$sort': dict(sort)},
+        {'$skip': skip},
+        {'$limit': limit},
+        {'$project': projection}
+    ]
+
+def hot_page_suffices(hot, limit, archived_before):
+    # A full page that ends above the boundary cannot have archived rows in it
+    return len(hot) == limit and hot[-1]['date'] >= archived_before
+
+def whole_buckets(query):
+    # Only user_id and month-aligned bounds: every matching bucket counts in full
+    if set(query) - {'user_id', 'date'} or set(query.get('date', {})) - {'$gte', '$lte'}:
+        return False
+    start = query.get('date', {}).get('$gte')
+    end = query.get('date', {}).get('$lte')
+    if start is not None and _naive_utc(start) != month_start(_naive_utc(start)):
+        return False
+    # Same tolerance as the rollups: an end date at 23:59:59 on the last day
+    if end is not None and _naive_utc(end) + timedelta(seconds=1) < next_month(_naive_utc(end)):
+        return False
+    return True
+
+def count_pipeline(query):
+    if whole_buckets(query):
+        return [{'$match': bucket_match(query)}, {'$group': {'_id': None, 'total': {'$sum': '$count'}}}]
+    return unwound(query) + [{'$count': 'total'}]
+
+def archived_total(results):
+    return results[0]['total'] if results else 0
+
+def find_page(db, query, projection, sort, skip, limit):
+    hot = list(db.transactions.find(query, projection).sort(sort).skip(skip).limit(limit))
+    archived_before = boundary()
+    if not reaches_archive(query, archived_before) or hot_page_suffices(hot, limit, archived_before):
+        return hot
+    return list(db.transactions.aggregate(page_pipeline(query, projection, sort, skip, limit)))
+
+def count(db, query):
+    total = db.transactions.count_documents(query)
+    if reaches_archive(query, boundary()):
+        total += archived_total(list(db.archived_transactions.aggregate(count_pipeline(query))))
+    return total
+
+def first_date(db, query):
+    # Date of the oldest matching transaction in either tier, None when there is none
+    dates = [t['date'] for t in db.transactions.find(query, {'date': 1}).sort('date', 1).limit(1)]
+    if reaches_archive(query, boundary()):
+        pipeline = unwound(query) + [{'$sort': {'date': 1}}, {'$limit': 1}, {'$project': {'date': 1}}]
+        dates += [t['date'] for t in db.archived_transactions.aggregate(pipeline)]
+    return min(dates, default=None)
+
+def export_cursor(db, query, fields, sort, batch_size):
+    if not reaches_archive(query, boundary()):
+        return db.transactions.find(query, fields).sort(sort).batch_size(batch_size)
+    pipeline = [{'$match': query}, union(query), {'$sort': dict(sort)}, {'$project': fields}]
+    return db.transactions.aggregate(pipeline, allowDiskUse=True, batchSize=batch_size)
+
+def writable(query):
+    # Rows marked for a move are read-only like the archive they are going to
+    return {**query, MARKER: {'$exists': False}}
+
+def being_archived(user_id, transaction_id):
+    return mongo.db.transactions.count_documents(
+        {'_id': ObjectId(transaction_id), 'user_id': ObjectId(user_id), MARKER: {'$exists': True}}, limit=1
+    ) > 0
+
+def find_archived(user_id, transaction_id):
+    if boundary() is None:
+        return None
+    query = {'user_id': ObjectId(user_id), '_id': ObjectId(transaction_id)}
+    pipeline = unwound(query)
+    pipeline[0]['$match']['transactions._id'] = query['_id']
+    results = list(mongo.db.archived_transactions.aggregate(pipeline))
+    return results[0] if results else None
+
+def iter_archived(user_id):
+    # Every archived transaction of a user, for the rollup and search term rebuilds
+    for bucket in mongo.db.archived_transactions.find({'user_id': user_id}):
+        for transaction in bucket['transactions']:
+            yield {**transaction, 'user_id': bucket['user_id']}
+
+def month_start(date):
+    return datetime(date.year, date.month, 1)
+
+def next_month(date):
+    return datetime(date.year + date.month // 12, date.month % 12 + 1, 1)
+
+def _write_bucket(bucket_id, transactions):
+    # Built from the marked rows themselves, so a resumed run writes the same bucket
+    first = transactions[0]
+    start = month_start(first['date'])
+    entries = sorted(
+        ({k: v for k, v in t.items() if k not in ('user_id', MARKER)} for t in transactions),
+        key=lambda t: (t['date'], t['_id']),
+        reverse=True
+    )
+    try:
+        mongo.db.archived_transactions.insert_one({
+            '_id': bucket_id,
+            'user_id': first['user_id'],
+            'month': start.strftime('%Y-%m'),
+            'start': start,
+            'end': next_month(start),
+            'count': len(entries),
+            'transactions': entries
+        })
+    except DuplicateKeyError:
+        pass
+
+def _move(bucket_id):
+    transactions = list(mongo.db.transactions.find({MARKER: bucket_id}))
+    if transactions:
+        _write_bucket(bucket_id, transactions)
+    return mongo.db.transactions.delete_many({MARKER: bucket_id}).deleted_count
+
+def _resume():
+    # Finish moves a previous run marked but did not delete
+    return sum(_move(bucket_id) for bucket_id in mongo.db.transactions.distinct(MARKER))
+
+def archive(horizon_days, user_id=None, bucket_size=1000, dry_run=False):
+    # Whole months only, so every archived month has a single boundary
+    cutoff = month_start(datetime.utcnow() - timedelta(days=horizon_days))
+    query = {'date': {'$lt': cutoff}, MARKER: {'$exists': False}}
+    if user_id:
+        query['user_id'] = ObjectId(user_id)
+
+    if dry_run:
+        return cutoff, mongo.db.transactions.count_documents(query)
+
+    # Published first, so reads consult the archive as soon as a bucket exists
+    mongo.db.archive_state.update_one({'_id': STATE_ID}, {'$max': {'archived_before': cutoff}}, upsert=True)
+    moved = _resume()
+
+    for uid in mongo.db.transactions.distinct('user_id', query):
+        chunk, month = [], None
+        for t in mongo.db.transactions.find({**query, 'user_id': uid}, {'date': 1}).sort('date', 1):
+            if chunk and (month_start(t['date']) != month or len(chunk) == bucket_size):
+                moved += _mark_and_move(chunk)
+                chunk = []
+            month = month_start(t['date'])
+            chunk.append(t['_id'])
+        if chunk:
+            moved += _mark_and_move(chunk)
+
+    return cutoff, moved
+
+def _mark_and_move(ids):
+    bucket_id = ObjectId()
+    mongo.db.transactions.update_many({'_id': {'$in': ids}, MARKER: {'$exists': False}}, {'$set': {MARKER: bucket_id}})
+    return _move(bucket_id)
+
+@click.command('archive-transactions')
+@click.option('--horizon-days', type=int, default=None, help='Archive whole months older than this (default: ARCHIVE_HORIZON_DAYS).')
+@click.option('--user-id', default=None, help='Only archive this user.')
+@click.option('--dry-run', is_flag=True, help='Only count what would move.')
+@with_appcontext
+def archive_transactions_command(horizon_days, user_id, dry_run):
+    """Move old transactions into per-user-month archive buckets.
+
+    Edits to a row while it is being moved are rejected like edits to
+    archived rows.
+    """
+    if not current_app.config['ARCHIVE_ENABLED']:
+        raise SystemExit('Set ARCHIVE_ENABLED=True first, or reads would not see archived transactions')
+
+    horizon_days = horizon_days if horizon_days is not None else current_app.config['ARCHIVE_HORIZON_DAYS']
+    cutoff, moved = archive(horizon_days, user_id, current_app.config['ARCHIVE_BUCKET_SIZE'], dry_run)
+
+    verb = 'Would archive' if dry_run else 'Archived'
+    click.echo(f'{verb} {moved} transactions dated before {cutoff:%Y-%m-%d}')
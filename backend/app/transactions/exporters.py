@@ -0,0 +1,154 @@
+from importlib.util import find_spec
+from io import StringIO
+from itertools import islice
+from tempfile import SpooledTemporaryFile
+import csv
+import json
+
+EXPORT_FIELDS = {'_id': 0, 'date': 1, 'type': 1, 'category': 1, 'amount': 1, 'description': 1}
+
+class UnsupportedFormat(ValueError):
+    pass
+
+def _batches(cursor, size):
+    iterator = iter(cursor)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def _stream_file(f, chunk_size=64 * 1024):
+    f.seek(0)
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+class Exporter:
+    mimetype = 'application/octet-stream'
+    extension = 'bin'
+    requires = ()
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+
+    def stream(self, cursor):
+        try:
+            yield from self.generate(cursor)
+        finally:
+            cursor.close()
+
+    def generate(self, cursor):
+        raise NotImplementedError
+
+class CsvExporter(Exporter):
+    mimetype = 'text/csv'
+    extension = 'csv'
+
+    def generate(self, cursor):
+        output = StringIO()
+        writer = csv.writer(output)
+
+        # Write header
+        writer.writerow(['Date', 'Type', 'Category', 'Amount', 'Description'])
+        yield output.getvalue()
+
+        # Write data
+        for batch in _batches(cursor, self.batch_size):
+            output.seek(0)
+            output.truncate()
+            for t in batch:
+                writer.writerow([
+                    t['date'].strftime('%Y-%m-%d'),
+                    t['type'],
+                    t['category'],
+                    t['amount'],
+                    t.get('description', '')
+                ])
+            yield output.getvalue()
+
+class NdjsonExporter(Exporter):
+    mimetype = 'application/x-ndjson'
+    extension = 'ndjson'
+
+    def generate(self, cursor):
+        for batch in _batches(cursor, self.batch_size):
+            yield ''.join(json.dumps({
+                'date': t['date'].isoformat(),
+                'type': t['type'],
+                'category': t['category'],
+                'amount': t['amount'],
+                'description': t.get('description', '')
+            }) + '\n' for t in batch)
+
+class ParquetExporter(Exporter):
+    mimetype = 'application/vnd.apache.parquet'
+    extension = 'parquet'
+    requires = ('pyarrow',)
+
+    def generate(self, cursor):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            ('date', pa.timestamp('ms')),
+            ('type', pa.string()),
+            ('category', pa.string()),
+            ('amount', pa.float64()),
+            ('description', pa.string())
+        ])
+
+        # Parquet writes its footer last, so spool to disk and stream afterwards
+        with SpooledTemporaryFile(max_size=8 * 1024 * 1024) as f:
+            with pq.ParquetWriter(f, schema, compression='zstd') as writer:
+                for batch in _batches(cursor, self.batch_size):
+                    writer.write_batch(pa.RecordBatch.from_pydict({
+                        'date': [t['date'] for t in batch],
+                        'type': [t['type'] for t in batch],
+                        'category': [t['category'] for t in batch],
+                        'amount': [t['amount'] for t in batch],
+                        'description': [t.get('description', '') for t in batch]
+                    }, schema=schema))
+
+            yield from _stream_file(f)
+
+class XlsxExporter(Exporter):
+    mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    extension = 'xlsx'
+    requires = ('openpyxl',)
+
+    def generate(self, cursor):
+        from openpyxl import Workbook
+
+        # Write-only mode keeps one row in memory at a time
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Transactions')
+        sheet.append(['Date', 'Type', 'Category', 'Amount', 'Description'])
+
+        for batch in _batches(cursor, self.batch_size):
+            for t in batch:
+                sheet.append([t['date'], t['type'], t['category'], t['amount'], t.get('description', '')])
+
+        with SpooledTemporaryFile(max_size=8 * 1024 * 1024) as f:
+            workbook.save(f)
+            yield from _stream_file(f)
+
+EXPORTERS = {
+    'csv': CsvExporter,
+    'ndjson': NdjsonExporter,
+    'parquet': ParquetExporter,
+    'xlsx': XlsxExporter
+}
+
+def get_exporter(format_, batch_size):
+    exporter = EXPORTERS.get(format_)
+    if exporter is None:
+        raise UnsupportedFormat(f"Unsupported export format: {format_}")
+
+    missing = [module for module in exporter.requires if find_spec(module) is None]
+    if missing:
+        raise UnsupportedFormat(f"Export format {format_} requires {', '.join(missing)}")
+
+    return exporter(batch_size)
@@ -0,0 +1,57 @@
+from datetime import datetime
+from bson import ObjectId
+import base64
+import json
+
+class InvalidCursor(ValueError):
+    pass
+
+def parse_date(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def build_query(user_id, args):
+    query = {'user_id': ObjectId(user_id)}
+
+    search = args.get('q')
+    category = args.get('category')
+    type_ = args.get('type')
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+
+    if search:
+        # Needs the user_id-prefixed text index, so always with user_id equality
+        query['$text'] = {'$search': search}
+    if category:
+        query['category'] = category
+    if type_:
+        query['type'] = type_
+    if start_date:
+        query['date'] = {'$gte': parse_date(start_date)}
+    if end_date:
+        query.setdefault('date', {})['$lte'] = parse_date(end_date)
+
+    return query
+
+def encode_cursor(transaction):
+    payload = json.dumps([transaction['date'].isoformat(), str(transaction['_id'])])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date, id_ = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(date), ObjectId(id_)
+    except Exception:
+        raise InvalidCursor('Invalid cursor')
+
+def seek_query(query, cursor):
+    # Continue strictly after (date, _id) in (date desc, _id desc) order
+    date, id_ = decode_cursor(cursor)
+    return {'$and': [
+        query,
+        {'date': {'$lte': date}},
+        {'$or': [
+            {'date': {'$lt': date}},
+            {'date': date, '_id': {'$lt': id_}}
+        ]}
+    ]}
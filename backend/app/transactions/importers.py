@@ -0,0 +1,64 @@
+from io import TextIOWrapper
+import csv
+import hashlib
+import json
+
+class UnsupportedImport(ValueError):
+    pass
+
+class InvalidRow:
+    def __init__(self, error):
+        self.error = error
+
+def _csv_rows(f):
+    # Header names are case-insensitive so exported CSVs import as-is
+    for row in csv.DictReader(f):
+        yield {key.strip().lower(): value for key, value in row.items() if key}
+
+def _ndjson_rows(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield InvalidRow('Invalid JSON')
+
+def read_rows(request):
+    if 'file' in request.files:
+        return _csv_rows(TextIOWrapper(request.files['file'].stream, encoding='utf-8-sig'))
+
+    if request.mimetype == 'text/csv':
+        return _csv_rows(TextIOWrapper(request.stream, encoding='utf-8-sig'))
+
+    if request.mimetype in ('application/x-ndjson', 'application/ndjson'):
+        return _ndjson_rows(request.stream)
+
+    if request.mimetype == 'application/json':
+        data = request.get_json(silent=True)
+        if data is None:
+            raise UnsupportedImport('Invalid JSON')
+        if isinstance(data, dict):
+            data = data.get('transactions')
+        if not isinstance(data, list):
+            raise UnsupportedImport('Expected a JSON array of transactions')
+        return iter(data)
+
+    raise UnsupportedImport('Send a JSON array, NDJSON or a CSV file')
+
+def import_hash(user_id, transaction, index, idempotency_key=None):
+    # With an idempotency key a retried request maps every row to the same hash;
+    # without one, identical rows are treated as duplicates
+    if idempotency_key:
+        source = f'{user_id}:{idempotency_key}:{index}'
+    else:
+        source = json.dumps([
+            user_id,
+            transaction['amount'],
+            transaction['category'],
+            transaction['type'],
+            transaction['date'].isoformat(),
+            transaction['description']
+        ])
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
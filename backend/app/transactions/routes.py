@@ -1,15 +1,24 @@
-from flask import Blueprint, request, jsonify, make_response
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from flask_jwt_extended import get_jwt_identity
 from app import mongo
-from app.models import Transaction
+from app.models import Transaction, parse_datetime
 from app.utils.decorators import jwt_required_custom
+from app.utils import rollups, tombstones
+from app.utils.cache import bump_version, cached
+from app.utils.reads import db_for
+from app.transactions.exporters import EXPORT_FIELDS, UnsupportedFormat, get_exporter
+from app.transactions.importers import InvalidRow, UnsupportedImport, import_hash, read_rows
+from app.transactions import archive, search, stats, timeseries
+from app.transactions.filters import InvalidCursor, build_query, encode_cursor, parse_date, seek_query
 from datetime import datetime
 from bson import ObjectId
-import csv
-from io import StringIO
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 
 transactions_bp = Blueprint('transactions', __name__)
 
+NEWEST_FIRST = [('date', -1), ('_id', -1)]
+
 @transactions_bp.route('/', methods=['POST'])
 @jwt_required_custom
 def create_transaction():
@@ -18,27 +27,122 @@ def create_transaction():
         data = request.get_json()
         
         # Validate
-        required = ['amount', 'category', 'type', 'date']
-        if not all(field in data for field in required):
-            return jsonify({'error': 'Missing required fields'}), 400
-        
-        if data['type'] not in ['income', 'expense']:
-            return jsonify({'error': 'Type must be income or expense'}), 400
+        error = Transaction.validate(data)
+        if error:
+            return jsonify({'error': error}), 400
         
-        # Create transaction
+        # Create transaction (insert_one sets _id on the document)
         transaction_data = Transaction.create(data, user_id)
-        result = mongo.db.transactions.insert_one(transaction_data)
-        
-        transaction = mongo.db.transactions.find_one({'_id': result.inserted_id})
+        mongo.db.transactions.insert_one(transaction_data)
+        rollups.record(transaction_data)
+        search.record(transaction_data)
+        bump_version(user_id)
         
         return jsonify({
             'message': 'Transaction created successfully',
-            'transaction': Transaction.to_json(transaction)
+            'transaction': Transaction.to_json(transaction_data)
         }), 201
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _insert_batch(batch, rows):
+    try:
+        mongo.db.transactions.insert_many(batch, ordered=False)
+        failed = {}
+    except BulkWriteError as e:
+        failed = {err['index']: err for err in e.details['writeErrors']}
+    
+    duplicates = 0
+    errors = []
+    for index, err in failed.items():
+        if err['code'] == 11000:
+            duplicates += 1
+        else:
+            errors.append({'row': rows[index], 'error': err['errmsg']})
+    
+    inserted = [t for index, t in enumerate(batch) if index not in failed]
+    rollups.apply_changes(added=inserted)
+    search.apply_changes(added=inserted)
+    
+    return len(inserted), duplicates, errors
+
+@transactions_bp.route('/bulk', methods=['POST'])
+@jwt_required_custom
+def bulk_import_transactions():
+    try:
+        user_id = get_jwt_identity()
+        idempotency_key = request.headers.get('Idempotency-Key')
+        dedupe = request.args.get('dedupe', 'false') == 'true'
+        batch_size = current_app.config['BULK_IMPORT_BATCH_SIZE']
+        max_rows = current_app.config['BULK_IMPORT_MAX_ROWS']
+        
+        inserted = 0
+        duplicates = 0
+        errors = []
+        batch = []
+        batch_rows = []
+        
+        for index, row in enumerate(read_rows(request)):
+            if index >= max_rows:
+                errors.append({'row': index, 'error': f'Imports are limited to {max_rows} rows'})
+                break
+            
+            # Validate with the same rules as single creates
+            if isinstance(row, InvalidRow):
+                errors.append({'row': index, 'error': row.error})
+                continue
+            if not isinstance(row, dict):
+                errors.append({'row': index, 'error': 'Row must be an object'})
+                continue
+            
+            error = Transaction.validate(row)
+            if error:
+                errors.append({'row': index, 'error': error})
+                continue
+            
+            try:
+                transaction_data = Transaction.create(row, user_id)
+            except (ValueError, TypeError, AttributeError) as e:
+                errors.append({'row': index, 'error': str(e)})
+                continue
+            
+            if idempotency_key or dedupe:
+                transaction_data['import_hash'] = import_hash(user_id, transaction_data, index, idempotency_key)
+            
+            batch.append(transaction_data)
+            batch_rows.append(index)
+            
+            if len(batch) == batch_size:
+                batch_inserted, batch_duplicates, batch_errors = _insert_batch(batch, batch_rows)
+                inserted += batch_inserted
+                duplicates += batch_duplicates
+                errors.extend(batch_errors)
+                batch = []
+                batch_rows = []
+        
+        if batch:
+            batch_inserted, batch_duplicates, batch_errors = _insert_batch(batch, batch_rows)
+            inserted += batch_inserted
+            duplicates += batch_duplicates
+            errors.extend(batch_errors)
+        
+        if inserted:
+            bump_version(user_id)
+        
+        return jsonify({
+            'message': f'Imported {inserted} transactions',
+            'inserted': inserted,
+            'duplicates': duplicates,
+            'errors': errors
+        }), 201 if inserted else 200
+    
+    except UnsupportedImport as e:
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @transactions_bp.route('/', methods=['GET'])
 @jwt_required_custom
 def get_transactions():
@@ -46,44 +150,79 @@ def get_transactions():
         user_id = get_jwt_identity()
         
         # Query parameters
-        page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 20))
-        category = request.args.get('category')
-        type_ = request.args.get('type')
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
+        cursor = request.args.get('cursor')
+        
+        query = build_query(user_id, request.args)
+        
+        # Cursor mode: seek on (date, _id) instead of skipping
+        if cursor is not None:
+            include_total = request.args.get('include_total', 'false') == 'true'
+            total = archive.count(mongo.db, query) if include_total else None
+            
+            if cursor:
+                query = seek_query(query, cursor)
+            
+            transactions = archive.find_page(mongo.db, query, Transaction.PROJECTION, NEWEST_FIRST, 0, limit + 1)
+            
+            has_more = len(transactions) > limit
+            transactions = transactions[:limit]
+            
+            response = {
+                'transactions': [Transaction.to_json(t) for t in transactions],
+                'next_cursor': encode_cursor(transactions[-1]) if has_more else None,
+                'has_more': has_more
+            }
+            if include_total:
+                response['total'] = total
+            
+            return jsonify(response), 200
         
-        # Build query
-        query = {'user_id': ObjectId(user_id)}
+        page = int(request.args.get('page', 1))
+        include_total = request.args.get('include_total', 'true') == 'true'
         
-        if category:
-            query['category'] = category
-        if type_:
-            query['type'] = type_
-        if start_date:
-            query['date'] = {'$gte': datetime.fromisoformat(start_date.replace('Z', '+00:00'))}
-        if end_date:
-            if 'date' in query:
-                query['date']['$lte'] = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-            else:
-                query['date'] = {'$lte': datetime.fromisoformat(end_date.replace('Z', '+00:00'))}
+        # Get total count (archived transactions included)
+        total = archive.count(mongo.db, query) if include_total else None
         
-        # Get total count
-        total = mongo.db.transactions.count_documents(query)
+        # Searches rank by text score unless sort=date
+        projection = Transaction.PROJECTION
+        sort = NEWEST_FIRST
+        if search.is_relevance_sort(request.args):
+            projection = {**projection, 'score': {'$meta': 'textScore'}}
+            sort = search.relevance_sort()
         
         # Get transactions
-        transactions = list(mongo.db.transactions.find(query)
-                          .sort('date', -1)
-                          .skip((page - 1) * limit)
-                          .limit(limit))
+        transactions = archive.find_page(mongo.db, query, projection, sort, (page - 1) * limit, limit)
         
         return jsonify({
             'transactions': [Transaction.to_json(t) for t in transactions],
             'total': total,
             'page': page,
-            'pages': (total + limit - 1) // limit
+            'pages': (total + limit - 1) // limit if include_total else None
         }), 200
     
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@transactions_bp.route('/suggest', methods=['GET'])
+@jwt_required_custom
+def suggest_terms():
+    try:
+        user_id = get_jwt_identity()
+        
+        prefix = request.args.get('prefix', '')
+        field = request.args.get('field')
+        limit = min(int(request.args.get('limit', 10)), 50)
+        
+        if field and field not in search.TERM_FIELDS:
+            return jsonify({'error': 'field must be category or payee'}), 400
+        
+        fields = [field] if field else search.TERM_FIELDS
+        return jsonify({f: search.suggest(user_id, prefix, f, limit) for f in fields}), 200
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -96,7 +235,7 @@ def get_transaction(transaction_id):
         transaction = mongo.db.transactions.find_one({
             '_id': ObjectId(transaction_id),
             'user_id': ObjectId(user_id)
-        })
+        }) or archive.find_archived(user_id, transaction_id)
         
         if not transaction:
             return jsonify({'error': 'Transaction not found'}), 404
@@ -106,6 +245,61 @@ def get_transaction(transaction_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _build_update(data):
+    # Prepare update
+    update_data = {'updated_at': datetime.utcnow()}
+    
+    if 'amount' in data:
+        update_data['amount'] = float(data['amount'])
+    if 'category' in data:
+        if not isinstance(data['category'], str):
+            return None, 'Category must be text'
+        update_data['category'] = data['category']
+    if 'type' in data:
+        if data['type'] not in ['income', 'expense']:
+            return None, 'Invalid type'
+        update_data['type'] = data['type']
+    if 'description' in data:
+        if not isinstance(data['description'], str):
+            return None, 'Description must be text'
+        update_data['description'] = data['description']
+    if 'date' in data:
+        update_data['date'] = parse_datetime(data['date'])
+    
+    return update_data, None
+
+def _bulk_scope(user_id, data):
+    # Either an explicit list of IDs or the same filters as GET /
+    if 'ids' in data:
+        return {'user_id': ObjectId(user_id), '_id': {'$in': [ObjectId(i) for i in data['ids']]}}, None
+    if 'filter' in data:
+        query = build_query(user_id, data['filter'])
+        # A filter that narrows nothing covers the whole history, so say so explicitly
+        if set(query) == {'user_id'} and data.get('all') is not True:
+            return None, 'Empty filter matches every transaction, send "all": true to confirm'
+        return query, None
+    return None, None
+
+# Fields the rollups and the search term index derive from
+SNAPSHOT_FIELDS = {**rollups.FIELDS, **search.FIELDS}
+
+def _id_batches(query, batch_size):
+    cursor = mongo.db.transactions.find(query, SNAPSHOT_FIELDS).batch_size(batch_size)
+    batch = []
+    for transaction in cursor:
+        batch.append(transaction)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _not_found(user_id, transaction_id):
+    # Archived transactions are read-only
+    if archive.being_archived(user_id, transaction_id) or archive.find_archived(user_id, transaction_id):
+        return jsonify({'error': 'Archived transactions cannot be changed'}), 400
+    return jsonify({'error': 'Transaction not found'}), 404
+
 @transactions_bp.route('/<transaction_id>', methods=['PUT'])
 @jwt_required_custom
 def update_transaction(transaction_id):
@@ -113,42 +307,116 @@ def update_transaction(transaction_id):
         user_id = get_jwt_identity()
         data = request.get_json()
         
-        # Check ownership
-        transaction = mongo.db.transactions.find_one({
-            '_id': ObjectId(transaction_id),
-            'user_id': ObjectId(user_id)
-        })
+        update_data, error = _build_update(data)
+        if error:
+            return jsonify({'error': error}), 400
         
-        if not transaction:
-            return jsonify({'error': 'Transaction not found'}), 404
-        
-        # Prepare update
-        update_data = {'updated_at': datetime.utcnow()}
-        
-        if 'amount' in data:
-            update_data['amount'] = float(data['amount'])
-        if 'category' in data:
-            update_data['category'] = data['category']
-        if 'type' in data:
-            if data['type'] not in ['income', 'expense']:
-                return jsonify({'error': 'Invalid type'}), 400
-            update_data['type'] = data['type']
-        if 'description' in data:
-            update_data['description'] = data['description']
-        if 'date' in data:
-            update_data['date'] = datetime.fromisoformat(data['date'].replace('Z', '+00:00'))
-        
-        # Update
-        mongo.db.transactions.update_one(
-            {'_id': ObjectId(transaction_id)},
-            {'$set': update_data}
+        # Check ownership and update in one round trip
+        transaction = mongo.db.transactions.find_one_and_update(
+            archive.writable({'_id': ObjectId(transaction_id), 'user_id': ObjectId(user_id)}),
+            {'$set': update_data},
+            return_document=ReturnDocument.BEFORE
         )
         
-        transaction = mongo.db.transactions.find_one({'_id': ObjectId(transaction_id)})
+        if not transaction:
+            return _not_found(user_id, transaction_id)
+        
+        updated = {**transaction, **update_data}
+        rollups.apply_changes(removed=[transaction], added=[updated])
+        search.apply_changes(removed=[transaction], added=[updated])
+        tombstones.record_moves(user_id, [transaction], [updated])
+        bump_version(user_id)
         
         return jsonify({
             'message': 'Transaction updated successfully',
-            'transaction': Transaction.to_json(transaction)
+            'transaction': Transaction.to_json(updated)
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@transactions_bp.route('/bulk', methods=['PUT'])
+@jwt_required_custom
+def bulk_update_transactions():
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json()
+        batch_size = current_app.config['BULK_IMPORT_BATCH_SIZE']
+        
+        # Per-transaction changes: [{'id': ..., <fields>}, ...]
+        if 'updates' in data:
+            changes = {}
+            for item in data['updates']:
+                update_data, error = _build_update(item)
+                if error:
+                    return jsonify({'error': error}), 400
+                changes[ObjectId(item['id'])] = update_data
+            
+            old = list(mongo.db.transactions.find(archive.writable({
+                '_id': {'$in': list(changes)},
+                'user_id': ObjectId(user_id)
+            })))
+            
+            if not old:
+                return jsonify({'message': 'No transactions updated', 'matched': 0, 'modified': 0}), 200
+            
+            result = mongo.db.transactions.bulk_write([
+                UpdateOne(archive.writable({'_id': t['_id'], 'user_id': ObjectId(user_id)}), {'$set': changes[t['_id']]})
+                for t in old
+            ], ordered=False)
+            updated = [{**t, **changes[t['_id']]} for t in old]
+            rollups.apply_changes(removed=old, added=updated)
+            search.apply_changes(removed=old, added=updated)
+            tombstones.record_moves(user_id, old, updated)
+            bump_version(user_id)
+            
+            return jsonify({
+                'message': f'Updated {result.modified_count} transactions',
+                'matched': result.matched_count,
+                'modified': result.modified_count
+            }), 200
+        
+        # Same change applied to every matching transaction
+        query, error = _bulk_scope(user_id, data)
+        if error:
+            return jsonify({'error': error}), 400
+        if query is None or 'set' not in data:
+            return jsonify({'error': 'Provide ids or filter, and set'}), 400
+        
+        update_data, error = _build_update(data['set'])
+        if error:
+            return jsonify({'error': error}), 400
+        
+        query = archive.writable(query)
+        
+        matched = 0
+        modified = 0
+        
+        if SNAPSHOT_FIELDS.keys() & update_data.keys():
+            # Snapshot the affected rows so rollup and term deltas match what was changed
+            for batch in _id_batches(query, batch_size):
+                result = mongo.db.transactions.update_many(
+                    archive.writable({'_id': {'$in': [t['_id'] for t in batch]}, 'user_id': ObjectId(user_id)}),
+                    {'$set': update_data}
+                )
+                updated = [{**t, **update_data} for t in batch]
+                rollups.apply_changes(removed=batch, added=updated)
+                search.apply_changes(removed=batch, added=updated)
+                tombstones.record_moves(user_id, batch, updated)
+                matched += result.matched_count
+                modified += result.modified_count
+        else:
+            result = mongo.db.transactions.update_many(query, {'$set': update_data})
+            matched = result.matched_count
+            modified = result.modified_count
+        
+        if modified:
+            bump_version(user_id)
+        
+        return jsonify({
+            'message': f'Updated {modified} transactions',
+            'matched': matched,
+            'modified': modified
         }), 200
     
     except Exception as e:
@@ -160,21 +428,59 @@ def delete_transaction(transaction_id):
     try:
         user_id = get_jwt_identity()
         
-        result = mongo.db.transactions.delete_one({
+        transaction = mongo.db.transactions.find_one_and_delete(archive.writable({
             '_id': ObjectId(transaction_id),
             'user_id': ObjectId(user_id)
-        })
+        }))
         
-        if result.deleted_count == 0:
-            return jsonify({'error': 'Transaction not found'}), 404
+        if not transaction:
+            return _not_found(user_id, transaction_id)
+        
+        rollups.unrecord(transaction)
+        search.unrecord(transaction)
+        tombstones.record('transactions', user_id, [transaction])
+        bump_version(user_id)
         
         return jsonify({'message': 'Transaction deleted successfully'}), 200
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@transactions_bp.route('/bulk', methods=['DELETE'])
+@jwt_required_custom
+def bulk_delete_transactions():
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        query, error = _bulk_scope(user_id, data)
+        if error:
+            return jsonify({'error': error}), 400
+        if query is None:
+            return jsonify({'error': 'Provide ids or filter'}), 400
+        
+        deleted = 0
+        for batch in _id_batches(archive.writable(query), current_app.config['BULK_IMPORT_BATCH_SIZE']):
+            result = mongo.db.transactions.delete_many(archive.writable({
+                '_id': {'$in': [t['_id'] for t in batch]},
+                'user_id': ObjectId(user_id)
+            }))
+            rollups.apply_changes(removed=batch)
+            search.apply_changes(removed=batch)
+            tombstones.record('transactions', user_id, batch)
+            deleted += result.deleted_count
+        
+        if deleted:
+            bump_version(user_id)
+        
+        return jsonify({'message': f'Deleted {deleted} transactions', 'deleted': deleted}), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @transactions_bp.route('/stats', methods=['GET'])
 @jwt_required_custom
+@cached('stats')
 def get_stats():
     try:
         user_id = get_jwt_identity()
@@ -183,53 +489,99 @@ def get_stats():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         
-        query = {'user_id': ObjectId(user_id)}
+        if start_date:
+            start_date = parse_date(start_date)
+        if end_date:
+            end_date = parse_date(end_date)
+        
+        detailed = request.args.get('detailed', 'false') == 'true'
+        
+        # Whole-month ranges are answered from the rollup collection
+        months = None
+        if current_app.config['USE_MONTHLY_ROLLUPS']:
+            months = rollups.whole_months(start_date, end_date)
+        
+        db = db_for('stats', user_id)
+        
+        if months is not None:
+            rows = stats.rows_from_rollups(rollups.find_rollups(user_id, *months, db=db))
+        else:
+            query = {'user_id': ObjectId(user_id)}
+            
+            if start_date:
+                query['date'] = {'$gte': start_date}
+            if end_date:
+                query.setdefault('date', {})['$lte'] = end_date
+            
+            pipeline = archive.with_archive(stats.build_pipeline(query), archive.boundary())
+            rows = stats.rows_from_pipeline(db.transactions.aggregate(pipeline))
+        
+        return jsonify(stats.summarize(rows, detailed)), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@transactions_bp.route('/stats/timeseries', methods=['GET'])
+@jwt_required_custom
+@cached('timeseries')
+def get_timeseries():
+    try:
+        user_id = get_jwt_identity()
+        
+        interval = request.args.get('interval', 'month')
+        group_by = request.args.get('group_by', 'type')
+        
+        if interval not in timeseries.INTERVALS:
+            return jsonify({'error': 'Interval must be day, week or month'}), 400
+        if group_by not in timeseries.GROUP_BY:
+            return jsonify({'error': 'group_by must be category or type'}), 400
+        
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
         
         if start_date:
-            query['date'] = {'$gte': datetime.fromisoformat(start_date.replace('Z', '+00:00'))}
+            start_date = parse_date(start_date)
         if end_date:
-            if 'date' in query:
-                query['date']['$lte'] = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-            else:
-                query['date'] = {'$lte': datetime.fromisoformat(end_date.replace('Z', '+00:00'))}
-        
-        # Aggregate stats
-        pipeline = [
-            {'$match': query},
-            {'$group': {
-                '_id': '$type',
-                'total': {'$sum': '$amount'}
-            }}
-        ]
-        
-        results = list(mongo.db.transactions.aggregate(pipeline))
-        
-        income = 0
-        expenses = 0
-        
-        for r in results:
-            if r['_id'] == 'income':
-                income = r['total']
-            elif r['_id'] == 'expense':
-                expenses = r['total']
-        
-        # Category breakdown
-        category_pipeline = [
-            {'$match': {**query, 'type': 'expense'}},
-            {'$group': {
-                '_id': '$category',
-                'total': {'$sum': '$amount'}
-            }},
-            {'$sort': {'total': -1}}
-        ]
-        
-        categories = list(mongo.db.transactions.aggregate(category_pipeline))
+            end_date = parse_date(end_date)
+        
+        # Monthly buckets over whole months come straight from the rollups,
+        # which know nothing of text search
+        months = None
+        if interval == 'month' and current_app.config['USE_MONTHLY_ROLLUPS'] and not request.args.get('q'):
+            months = rollups.whole_months(start_date, end_date)
+        
+        db = db_for('timeseries', user_id)
+        
+        # Buckets span the requested range, or from the oldest matching transaction;
+        # checked before aggregating so oversized ranges cost one cheap lookup
+        end = end_date or datetime.utcnow()
+        first = start_date or archive.first_date(db, build_query(user_id, request.args)) or end
+        max_buckets = current_app.config['TIMESERIES_MAX_BUCKETS']
+        if timeseries.bucket_count(first, end, interval) > max_buckets:
+            return jsonify({'error': f'Range exceeds {max_buckets} buckets, use a larger interval'}), 400
+        
+        if months is not None:
+            filters = {field: request.args[field] for field in ('category', 'type') if request.args.get(field)}
+            results = [
+                (datetime.strptime(r['month'], '%Y-%m'), r[group_by], r['total'])
+                for r in rollups.find_rollups(user_id, *months, db=db, **filters)
+            ]
+        else:
+            pipeline = timeseries.build_pipeline(build_query(user_id, request.args), interval, group_by)
+            pipeline = archive.with_archive(pipeline, archive.boundary())
+            results = [
+                (r['_id']['bucket'], r['_id']['key'], r['total'])
+                for r in db.transactions.aggregate(pipeline)
+            ]
+        
+        # Fill empty buckets across the range
+        buckets = timeseries.bucket_range(first, end, interval)
         
         return jsonify({
-            'income': income,
-            'expenses': expenses,
-            'balance': income - expenses,
-            'categories': [{'category': c['_id'], 'amount': c['total']} for c in categories]
+            'interval': interval,
+            'group_by': group_by,
+            'buckets': [bucket.isoformat() for bucket in buckets],
+            'series': timeseries.fill(results, buckets)
         }), 200
     
     except Exception as e:
@@ -241,52 +593,21 @@ def export_transactions():
     try:
         user_id = get_jwt_identity()
         
-        # Get filters
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        category = request.args.get('category')
-        type_ = request.args.get('type')
+        query = build_query(user_id, request.args)
         
-        query = {'user_id': ObjectId(user_id)}
+        exporter = get_exporter(request.args.get('format', 'csv'), current_app.config['EXPORT_BATCH_SIZE'])
         
-        if category:
-            query['category'] = category
-        if type_:
-            query['type'] = type_
-        if start_date:
-            query['date'] = {'$gte': datetime.fromisoformat(start_date.replace('Z', '+00:00'))}
-        if end_date:
-            if 'date' in query:
-                query['date']['$lte'] = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-            else:
-                query['date'] = {'$lte': datetime.fromisoformat(end_date.replace('Z', '+00:00'))}
+        # Stream only the exported fields straight from the cursor
+        cursor = archive.export_cursor(db_for('export', user_id), query, EXPORT_FIELDS, NEWEST_FIRST,
+                                       current_app.config['EXPORT_BATCH_SIZE'])
         
-        # Get transactions
-        transactions = list(mongo.db.transactions.find(query).sort('date', -1))
-        
-        # Create CSV
-        output = StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['Date', 'Type', 'Category', 'Amount', 'Description'])
-        
-        # Write data
-        for t in transactions:
-            writer.writerow([
-                t['date'].strftime('%Y-%m-%d'),
-                t['type'],
-                t['category'],
-                t['amount'],
-                t.get('description', '')
-            ])
-        
-        # Create response
-        response = make_response(output.getvalue())
-        response.headers['Content-Type'] = 'text/csv'
-        response.headers['Content-Disposition'] = 'attachment; filename=transactions.csv'
+        response = Response(stream_with_context(exporter.stream(cursor)), mimetype=exporter.mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename=transactions.{exporter.extension}'
         
         return response
     
+    except UnsupportedFormat as e:
+        return jsonify({'error': str(e)}), 400
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
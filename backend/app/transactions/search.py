@@ -0,0 +1,124 @@
+from app import mongo
+from app.transactions import archive
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from flask.cli import with_appcontext
+import click
+import itertools
+import re
+
+# Fields the term index is built from
+FIELDS = {'user_id': 1, 'category': 1, 'description': 1}
+TERM_FIELDS = ('category', 'payee')
+MAX_TERM_LENGTH = 64
+
+def is_relevance_sort(args):
+    # Searches rank by text score unless the client asks for date order
+    return bool(args.get('q')) and args.get('sort', 'relevance') == 'relevance'
+
+def relevance_sort():
+    return [('score', {'$meta': 'textScore'}), ('date', -1), ('_id', -1)]
+
+def _payee(description):
+    return str(description or '').strip()[:MAX_TERM_LENGTH]
+
+def terms(transaction):
+    # (field, term, display) entries a transaction contributes
+    # str() for rows stored before category and description were validated as text
+    category = str(transaction['category'])[:MAX_TERM_LENGTH]
+    yield 'category', category.lower(), category
+    payee = _payee(transaction.get('description'))
+    if payee:
+        yield 'payee', payee.lower(), payee
+
+def apply_changes(removed=(), added=()):
+    # Same shape as rollups.apply_changes: one $inc per (user, field, term)
+    deltas = {}
+    displays = {}
+    for sign, transactions in ((-1, removed), (1, added)):
+        for t in transactions:
+            for field, term, display in terms(t):
+                key = (t['user_id'], field, term)
+                deltas[key] = deltas.get(key, 0) + sign
+                if sign > 0:
+                    displays[key] = display
+
+    now = datetime.utcnow()
+    operations = []
+    for (user_id, field, term), count in deltas.items():
+        if not count and (user_id, field, term) not in displays:
+            continue
+        update = {'$inc': {'count': count}, '$set': {'updated_at': now}}
+        if (user_id, field, term) in displays:
+            update['$set']['display'] = displays[(user_id, field, term)]
+        operations.append(UpdateOne({'user_id': user_id, 'field': field, 'term': term}, update, upsert=True))
+
+    if operations:
+        mongo.db.search_terms.bulk_write(operations, ordered=False)
+
+def record(transaction):
+    apply_changes(added=[transaction])
+
+def unrecord(transaction):
+    apply_changes(removed=[transaction])
+
+def suggest_query(user_id, prefix, field):
+    # Anchored, lowercase prefix: a range scan on (user_id, field, term)
+    return {
+        'user_id': ObjectId(user_id),
+        'field': field,
+        'term': {'$regex': '^' + re.escape(prefix.lower())},
+        'count': {'$gt': 0}
+    }
+
+def suggest(user_id, prefix, field, limit=10):
+    results = mongo.db.search_terms.find(
+        suggest_query(user_id, prefix, field),
+        {'display': 1, 'count': 1}
+    ).sort([('count', -1)]).limit(limit)
+    return [{'value': r['display'], 'count': r['count']} for r in results]
+
+def rebuild(user_id=None):
+    # Streams each user's transactions through terms() so the rebuilt counts
+    # normalize exactly like the incremental updates
+    query = {'user_id': ObjectId(user_id)} if user_id else {}
+    mongo.db.search_terms.delete_many(query)
+
+    if user_id:
+        user_ids = [ObjectId(user_id)]
+    else:
+        pipeline = archive.with_archive([{'$match': {}}, {'$group': {'_id': '$user_id'}}], archive.boundary())
+        user_ids = (r['_id'] for r in mongo.db.transactions.aggregate(pipeline, allowDiskUse=True))
+
+    archived = archive.boundary() is not None
+    now = datetime.utcnow()
+    written = 0
+    for uid in user_ids:
+        counts = {}
+        displays = {}
+        transactions = mongo.db.transactions.find({'user_id': uid}, FIELDS).batch_size(1000)
+        if archived:
+            transactions = itertools.chain(transactions, archive.iter_archived(uid))
+        for t in transactions:
+            for field, term, display in terms(t):
+                counts[(field, term)] = counts.get((field, term), 0) + 1
+                displays.setdefault((field, term), display)
+
+        docs = [
+            {'user_id': uid, 'field': field, 'term': term, 'display': displays[(field, term)], 'count': count, 'updated_at': now}
+            for (field, term), count in counts.items()
+        ]
+        for i in range(0, len(docs), 1000):
+            mongo.db.search_terms.insert_many(docs[i:i + 1000], ordered=False)
+        written += len(docs)
+
+    return written
+
+@click.command('rebuild-search-terms')
+@click.option('--user-id', default=None, help='Only rebuild terms for this user.')
+@with_appcontext
+def rebuild_search_terms_command(user_id):
+    """Backfill the per-user search_terms index from transactions."""
+    written = rebuild(user_id)
+    click.echo(f'Rebuilt {written} search terms')
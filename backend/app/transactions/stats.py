@@ -0,0 +1,49 @@
+def build_pipeline(query):
+    # One pass over the range; everything else is derived from (type, category) groups
+    return [
+        {'$match': query},
+        {
+            '$group': {
+                '_id': {'type': '$type', 'category': '$category'},
+                'total': {'$sum': '$amount'},
+                'count': {'$sum': 1}
+            }
+        }
+    ]
+
+def rows_from_pipeline(results):
+    for r in results:
+        yield r['_id']['type'], r['_id']['category'], r['total'], r['count']
+
+def rows_from_rollups(results):
+    for r in results:
+        yield r['type'], r['category'], r['total'], r['count']
+
+def summarize(rows, detailed=False):
+    totals = {'income': 0, 'expense': 0}
+    counts = {'income': 0, 'expense': 0}
+    categories = {'income': {}, 'expense': {}}
+
+    for type_, category, total, count in rows:
+        if type_ not in totals:
+            continue
+        totals[type_] += total
+        counts[type_] += count
+        categories[type_][category] = categories[type_].get(category, 0) + total
+
+    def breakdown(type_):
+        items = sorted(categories[type_].items(), key=lambda c: c[1], reverse=True)
+        return [{'category': category, 'amount': amount} for category, amount in items]
+
+    stats = {
+        'income': totals['income'],
+        'expenses': totals['expense'],
+        'balance': totals['income'] - totals['expense'],
+        'categories': breakdown('expense')
+    }
+
+    if detailed:
+        stats['income_categories'] = breakdown('income')
+        stats['counts'] = counts
+
+    return stats
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+
+INTERVALS = ('day', 'week', 'month')
+GROUP_BY = ('category', 'type')
+
+def truncate(date, interval):
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+
+    date = datetime(date.year, date.month, date.day)
+    if interval == 'week':
+        # Weeks start on Monday, matching $dateTrunc startOfWeek below
+        date -= timedelta(days=date.weekday())
+    elif interval == 'month':
+        date = date.replace(day=1)
+    return date
+
+def next_bucket(date, interval):
+    if interval == 'day':
+        return date + timedelta(days=1)
+    if interval == 'week':
+        return date + timedelta(weeks=1)
+    if date.month == 12:
+        return datetime(date.year + 1, 1, 1)
+    return datetime(date.year, date.month + 1, 1)
+
+def bucket_count(start_date, end_date, interval):
+    # Length of bucket_range without building it
+    start = truncate(start_date, interval)
+    end = truncate(end_date, interval)
+    if end < start:
+        return 0
+    if interval == 'day':
+        return (end - start).days + 1
+    if interval == 'week':
+        return (end - start).days // 7 + 1
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+def bucket_range(start_date, end_date, interval):
+    buckets = []
+    bucket = truncate(start_date, interval)
+    end_date = truncate(end_date, interval)
+    while bucket <= end_date:
+        buckets.append(bucket)
+        bucket = next_bucket(bucket, interval)
+    return buckets
+
+def build_pipeline(query, interval, group_by):
+    bucket = {'date': '$date', 'unit': interval}
+    if interval == 'week':
+        bucket['startOfWeek'] = 'monday'
+
+    return [
+        {'$match': query},
+        {
+            '$group': {
+                '_id': {'bucket': {'$dateTrunc': bucket}, 'key': f'${group_by}'},
+                'total': {'$sum': '$amount'}
+            }
+        }
+    ]
+
+def fill(results, buckets):
+    # results: iterable of (bucket, key, total); empty buckets become 0
+    positions = {bucket: i for i, bucket in enumerate(buckets)}
+    series = {}
+    for bucket, key, total in results:
+        if bucket not in positions:
+            continue
+        values = series.setdefault(key, [0] * len(buckets))
+        values[positions[bucket]] += total
+
+    return [{'key': key, 'values': values} for key, values in sorted(series.items())]
@@ -0,0 +1,112 @@
+from app import mongo
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, g, request, make_response
+from flask_jwt_extended import get_jwt_identity
+from werkzeug.utils import import_string
+from bson import ObjectId
+import hashlib
+import json
+import threading
+import time
+
+class CacheBackend:
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        raise NotImplementedError
+
+class MemoryCache(CacheBackend):
+    # Per-process LRU with a TTL per entry
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+BACKENDS = {
+    'memory': MemoryCache
+}
+
+class ResponseCache:
+    def __init__(self):
+        self.backend = None
+
+    def init_app(self, app):
+        backend = app.config['CACHE_BACKEND']
+        backend_class = BACKENDS.get(backend) or import_string(backend)
+        self.backend = backend_class(app.config['CACHE_MAX_ENTRIES'])
+        app.extensions['response_cache'] = self
+
+response_cache = ResponseCache()
+
+def version_state(user_id):
+    # One lookup per request, shared by the cache key and read routing
+    if 'version_state' not in g:
+        g.version_state = mongo.db.cache_versions.find_one({'_id': ObjectId(user_id)}) or {}
+    return g.version_state
+
+def user_version(user_id):
+    return version_state(user_id).get('version', 0)
+
+def last_write_at(user_id):
+    return version_state(user_id).get('last_write_at')
+
+def bump_version(user_id):
+    # Every cached response for this user becomes unreachable
+    mongo.db.cache_versions.update_one(
+        {'_id': ObjectId(user_id)},
+        {'$inc': {'version': 1}, '$currentDate': {'last_write_at': True}},
+        upsert=True
+    )
+    g.pop('version_state', None)
+
+def cached(namespace):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not current_app.config['CACHE_ENABLED']:
+                return fn(*args, **kwargs)
+
+            user_id = get_jwt_identity()
+            params = json.dumps([sorted(request.args.items(multi=True)), sorted(kwargs.items())])
+            key = f'{namespace}:{user_id}:{user_version(user_id)}:{params}'
+
+            entry = response_cache.backend.get(key)
+            if entry is None:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+                body = response.get_data()
+                entry = (body, response.mimetype, hashlib.sha1(body).hexdigest())
+                response_cache.backend.set(key, entry, current_app.config['CACHE_TTL'])
+
+            body, mimetype, etag = entry
+            response = current_app.response_class(body, mimetype=mimetype)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+
+            # Turns into 304 Not Modified when If-None-Match matches
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
@@ -1,13 +1,13 @@
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask import jsonify, request
+from app.utils.tokens import bearer_token, load_claims, token_verifier
 
 def jwt_required_custom(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         try:
-            verify_jwt_in_request()
-            return fn(*args, **kwargs)
+            load_claims(token_verifier.verify(bearer_token(request.headers.get('Authorization', ''))))
         except Exception as e:
             return jsonify({'error': 'Invalid or expired token'}), 401
-    return wrapper
\ No newline at end of file
+        return fn(*args, **kwargs)
+    return wrapper
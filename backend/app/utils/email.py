@@ -1,16 +1,9 @@
-from flask_mail import Message
-from app import mail
 import secrets
 
-def send_password_reset_email(email, token):
-    msg = Message(
-        'Password Reset Request - FinanceFlow',
-        recipients=[email]
-    )
-    
+def password_reset_email(email, token):
     reset_link = f"http://localhost:5173/reset-password/{token}"
     
-    msg.body = f'''Hello,
+    body = f'''Hello,
 
 You requested to reset your password for FinanceFlow.
 
@@ -25,7 +18,7 @@ Best regards,
 FinanceFlow Team
 '''
     
-    msg.html = f'''
+    html = f'''
     <html>
         <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
             <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
@@ -45,32 +38,18 @@ FinanceFlow Team
     </html>
     '''
     
-    try:
-        mail.send(msg)
-        return True
-    except Exception as e:
-        print(f"Error sending email: {e}")
-        return False
-
-def send_sms(phone, message):
-    try:
-        from twilio.rest import Client
-        from flask import current_app
-        
-        client = Client(
-            current_app.config['TWILIO_ACCOUNT_SID'],
-            current_app.config['TWILIO_AUTH_TOKEN']
-        )
-        
-        message = client.messages.create(
-            body=message,
-            from_=current_app.config['TWILIO_PHONE_NUMBER'],
-            to=phone
-        )
-        return True
-    except Exception as e:
-        print(f"Error sending SMS: {e}")
-        return False
+    return {
+        'subject': 'Password Reset Request - FinanceFlow',
+        'recipients': [email],
+        'body': body,
+        'html': html
+    }
+
+def password_reset_sms(phone, token):
+    return {
+        'to': phone,
+        'body': f"Your FinanceFlow password reset code: {token[:8]}"
+    }
 
 def generate_reset_token():
     return secrets.token_urlsafe(32)
\ No newline at end of file
@@ -0,0 +1,334 @@
+from bisect import bisect_left
+from flask import current_app, g, has_request_context, request
+from pymongo import monitoring
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.connections_open = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.waiting = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.pool_clears = 0
+
+    def _wait_time(self, event):
+        # PyMongo >= 4.7 reports the checkout duration itself
+        duration = getattr(event, 'duration', None)
+        if duration is None:
+            started = getattr(self._local, 'checkout_started', None)
+            duration = time.perf_counter() - started if started else 0.0
+        return duration
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+            self.connections_open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+            self.connections_open -= 1
+
+    def connection_check_out_started(self, event):
+        self._local.checkout_started = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        wait = self._wait_time(event)
+        with self._lock:
+            self.waiting -= 1
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self.wait_time_total += wait
+            self.wait_time_max = max(self.wait_time_max, wait)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'connections_open': self.connections_open,
+                'connections_created': self.connections_created,
+                'connections_closed': self.connections_closed,
+                'in_use': self.in_use,
+                'max_in_use': self.max_in_use,
+                'waiting': self.waiting,
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'wait_time_avg_ms': (self.wait_time_total / self.checkouts * 1000) if self.checkouts else 0,
+                'wait_time_max_ms': self.wait_time_max * 1000,
+                'pool_clears': self.pool_clears
+            }
+
+class CommandMetrics(monitoring.CommandListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.commands = {}
+
+    def begin_request(self):
+        # Commands run synchronously on the request thread, so a
+        # thread-local tally attributes them to the current request
+        self._local.request = [0, 0.0]
+
+    def end_request(self):
+        tally = getattr(self._local, 'request', None) or [0, 0.0]
+        self._local.request = None
+        return tally
+
+    def _record(self, event, failed):
+        tally = getattr(self._local, 'request', None)
+        if tally is not None:
+            tally[0] += 1
+            tally[1] += event.duration_micros / 1000000
+
+        with self._lock:
+            stats = self.commands.setdefault(event.command_name, {
+                'count': 0,
+                'failures': 0,
+                'time_total_ms': 0.0,
+                'time_max_ms': 0.0
+            })
+            duration = event.duration_micros / 1000
+            stats['count'] += 1
+            stats['failures'] += failed
+            stats['time_total_ms'] += duration
+            stats['time_max_ms'] = max(stats['time_max_ms'], duration)
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, False)
+
+    def failed(self, event):
+        self._record(event, True)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {
+                    **stats,
+                    'time_avg_ms': stats['time_total_ms'] / stats['count'] if stats['count'] else 0
+                }
+                for name, stats in self.commands.items()
+            }
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+def record_serialization(seconds):
+    # Called by the JSON provider for every dumps
+    if has_request_context():
+        g.serialization_time = g.get('serialization_time', 0.0) + seconds
+
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profile_slot = threading.Lock()
+        self.routes = {}
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.extensions['request_metrics'] = self
+
+    def _before_request(self):
+        g.request_started = time.perf_counter()
+        g.serialization_time = 0.0
+        command_metrics.begin_request()
+
+        # cProfile allows one active profiler, so only one sampled request at a time
+        sample_rate = current_app.config['PROFILE_SAMPLE_RATE']
+        if sample_rate and random.random() < sample_rate and self._profile_slot.acquire(blocking=False):
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    def _after_request(self, response):
+        started = g.get('request_started')
+        if started is None:
+            return response
+
+        duration = time.perf_counter() - started
+        commands, mongo_time = command_metrics.end_request()
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+
+        with self._lock:
+            stats = self.routes.setdefault((request.method, route), {
+                'latency': Histogram(),
+                'statuses': {},
+                'mongo_commands': 0,
+                'mongo_commands_max': 0,
+                'mongo_time': 0.0,
+                'serialization_time': 0.0
+            })
+            stats['latency'].observe(duration)
+            stats['statuses'][response.status_code] = stats['statuses'].get(response.status_code, 0) + 1
+            stats['mongo_commands'] += commands
+            stats['mongo_commands_max'] = max(stats['mongo_commands_max'], commands)
+            stats['mongo_time'] += mongo_time
+            stats['serialization_time'] += g.get('serialization_time', 0.0)
+        return response
+
+    def _teardown_request(self, exc):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return
+
+        try:
+            profiler.disable()
+            duration_ms = (time.perf_counter() - g.request_started) * 1000
+            if duration_ms >= current_app.config['PROFILE_SLOW_REQUEST_MS']:
+                self._dump(profiler, duration_ms)
+        finally:
+            self._profile_slot.release()
+
+    def _dump(self, profiler, duration_ms):
+        directory = current_app.config['PROFILE_DIR']
+        os.makedirs(directory, exist_ok=True)
+        route = re.sub(r'[^A-Za-z0-9]+', '_', request.path).strip('_') or 'root'
+        path = os.path.join(directory, f'{int(time.time() * 1000)}-{request.method}-{route}-{int(duration_ms)}ms.prof')
+        profiler.dump_stats(path)
+        current_app.logger.warning(f'Slow request {request.method} {request.path} took {duration_ms:.0f}ms, profile written to {path}')
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                f'{method} {route}': {
+                    'count': stats['latency'].count,
+                    'statuses': {str(code): n for code, n in stats['statuses'].items()},
+                    'time_avg_ms': stats['latency'].sum / stats['latency'].count * 1000,
+                    'time_max_ms': stats['latency'].max * 1000,
+                    'mongo_commands_avg': stats['mongo_commands'] / stats['latency'].count,
+                    'mongo_commands_max': stats['mongo_commands_max'],
+                    'mongo_time_avg_ms': stats['mongo_time'] / stats['latency'].count * 1000,
+                    'serialization_time_avg_ms': stats['serialization_time'] / stats['latency'].count * 1000
+                }
+                for (method, route), stats in self.routes.items()
+            }
+
+def _labels(**labels):
+    escaped = (
+        f'{name}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in labels.items()
+    )
+    return '{' + ','.join(escaped) + '}'
+
+def prometheus_text():
+    # Prometheus text exposition format, version 0.0.4
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for suffix, labels, value in samples:
+            lines.append(f'{name}{suffix}{_labels(**labels) if labels else ""} {value}')
+
+    with request_metrics._lock:
+        routes = sorted(request_metrics.routes.items())
+
+        latency = []
+        for (method, route), stats in routes:
+            for bound, count in stats['latency'].cumulative():
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                latency.append(('_bucket', {'method': method, 'route': route, 'le': le}, count))
+            latency.append(('_sum', {'method': method, 'route': route}, stats['latency'].sum))
+            latency.append(('_count', {'method': method, 'route': route}, stats['latency'].count))
+        metric('financeflow_http_request_duration_seconds', 'histogram', 'Request latency by route.', latency)
+
+        metric('financeflow_http_requests_total', 'counter', 'Requests by route and status.', [
+            ('', {'method': method, 'route': route, 'status': status}, count)
+            for (method, route), stats in routes
+            for status, count in sorted(stats['statuses'].items())
+        ])
+
+        per_route = [
+            ('financeflow_http_request_mongo_commands_total', 'counter', 'Mongo commands issued while serving the route.', 'mongo_commands'),
+            ('financeflow_http_request_mongo_commands_max', 'gauge', 'Most Mongo commands seen in a single request.', 'mongo_commands_max'),
+            ('financeflow_http_request_mongo_seconds_total', 'counter', 'Time spent in Mongo commands while serving the route.', 'mongo_time'),
+            ('financeflow_http_request_serialization_seconds_total', 'counter', 'Time spent serializing JSON responses.', 'serialization_time')
+        ]
+        for name, kind, help_text, field in per_route:
+            metric(name, kind, help_text, [
+                ('', {'method': method, 'route': route}, stats[field])
+                for (method, route), stats in routes
+            ])
+
+    for field, value in pool_metrics.snapshot().items():
+        kind = 'counter' if field in ('connections_created', 'connections_closed', 'checkouts', 'checkout_failures', 'pool_clears') else 'gauge'
+        metric(f'financeflow_mongo_pool_{field}', kind, f'Connection pool {field.replace("_", " ")}.', [('', None, value)])
+
+    commands = sorted(command_metrics.snapshot().items())
+    metric('financeflow_mongo_commands_total', 'counter', 'Mongo commands by name.', [
+        ('', {'command': name}, stats['count']) for name, stats in commands
+    ])
+    metric('financeflow_mongo_command_failures_total', 'counter', 'Failed Mongo commands by name.', [
+        ('', {'command': name}, stats['failures']) for name, stats in commands
+    ])
+    metric('financeflow_mongo_command_seconds_total', 'counter', 'Time spent in Mongo commands by name.', [
+        ('', {'command': name}, stats['time_total_ms'] / 1000) for name, stats in commands
+    ])
+
+    return '\n'.join(lines) + '\n'
+
+pool_metrics = PoolMetrics()
+command_metrics = CommandMetrics()
+request_metrics = RequestMetrics()
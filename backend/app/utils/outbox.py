@@ -0,0 +1,206 @@
+from app import mongo, mail
+from datetime import datetime, timedelta
+from flask import current_app
+from flask.cli import with_appcontext
+from flask_mail import Message
+from pymongo import ReturnDocument
+import click
+import threading
+
+def enqueue(kind, payload):
+    now = datetime.utcnow()
+    mongo.db.outbox.insert_one({
+        'kind': kind,  # 'email' or 'sms'
+        'payload': payload,
+        'status': 'pending',
+        'attempts': 0,
+        'next_attempt_at': now,
+        'created_at': now,
+        'updated_at': now
+    })
+
+class SmtpTransport:
+    def send_batch(self, payloads):
+        # One SMTP connection for the whole batch
+        results = []
+        with mail.connect() as connection:
+            for payload in payloads:
+                try:
+                    connection.send(Message(
+                        payload['subject'],
+                        recipients=payload['recipients'],
+                        body=payload['body'],
+                        html=payload.get('html')
+                    ))
+                    results.append(None)
+                except Exception as e:
+                    results.append(str(e))
+        return results
+
+class TwilioTransport:
+    def __init__(self):
+        self._client = None
+
+    def send_batch(self, payloads):
+        if self._client is None:
+            from twilio.rest import Client
+
+            self._client = Client(
+                current_app.config['TWILIO_ACCOUNT_SID'],
+                current_app.config['TWILIO_AUTH_TOKEN']
+            )
+
+        results = []
+        for payload in payloads:
+            try:
+                self._client.messages.create(
+                    body=payload['body'],
+                    from_=current_app.config['TWILIO_PHONE_NUMBER'],
+                    to=payload['to']
+                )
+                results.append(None)
+            except Exception as e:
+                results.append(str(e))
+        return results
+
+class FakeTransport:
+    # Local sink for development and tests: records instead of sending
+    def __init__(self):
+        self.sent = []
+
+    def send_batch(self, payloads):
+        self.sent.extend(payloads)
+        return [None] * len(payloads)
+
+TRANSPORTS = {
+    'smtp': SmtpTransport,
+    'twilio': TwilioTransport,
+    'fake': FakeTransport
+}
+
+def claim_query(kind, now, lock_timeout):
+    return {
+        'kind': kind,
+        '$or': [
+            {'status': 'pending', 'next_attempt_at': {'$lte': now}},
+            {'status': 'sending', 'locked_at': {'$lt': now - lock_timeout}}
+        ]
+    }
+
+class OutboxWorker:
+    def __init__(self, app):
+        self.app = app
+        self.batch_size = app.config['OUTBOX_BATCH_SIZE']
+        self.max_attempts = app.config['OUTBOX_MAX_ATTEMPTS']
+        self.retry_backoff = app.config['OUTBOX_RETRY_BACKOFF']
+        self.lock_timeout = timedelta(seconds=app.config['OUTBOX_LOCK_TIMEOUT'])
+        self.retention = timedelta(days=app.config['OUTBOX_RETENTION_DAYS'])
+        self.transports = {
+            'email': TRANSPORTS[app.config['MAIL_TRANSPORT']](),
+            'sms': TRANSPORTS[app.config['SMS_TRANSPORT']]()
+        }
+        self._stop = threading.Event()
+
+    def _claim(self, kind):
+        # Pending messages that are due, or ones a crashed worker left locked
+        now = datetime.utcnow()
+        return mongo.db.outbox.find_one_and_update(
+            claim_query(kind, now, self.lock_timeout),
+            {
+                '$set': {'status': 'sending', 'locked_at': now, 'updated_at': now},
+                '$inc': {'attempts': 1}
+            },
+            sort=[('next_attempt_at', 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _record(self, message, error):
+        now = datetime.utcnow()
+        if error is None:
+            update = {'status': 'sent', 'sent_at': now, 'last_error': None, 'expires_at': now + self.retention}
+        elif message['attempts'] >= self.max_attempts:
+            update = {'status': 'failed', 'last_error': error, 'expires_at': now + self.retention}
+        else:
+            delay = self.retry_backoff * 2 ** (message['attempts'] - 1)
+            update = {
+                'status': 'pending',
+                'next_attempt_at': now + timedelta(seconds=delay),
+                'last_error': error
+            }
+
+        update['updated_at'] = now
+        mongo.db.outbox.update_one({'_id': message['_id']}, {'$set': update})
+
+    def run_once(self):
+        delivered = 0
+        with self.app.app_context():
+            for kind, transport in self.transports.items():
+                batch = []
+                while len(batch) < self.batch_size:
+                    message = self._claim(kind)
+                    if message is None:
+                        break
+                    batch.append(message)
+
+                if not batch:
+                    continue
+
+                try:
+                    errors = transport.send_batch([m['payload'] for m in batch])
+                except Exception as e:
+                    errors = [str(e)] * len(batch)
+
+                for message, error in zip(batch, errors):
+                    self._record(message, error)
+                    if error is None:
+                        delivered += 1
+        return delivered
+
+    def run_forever(self):
+        poll_interval = self.app.config['OUTBOX_POLL_INTERVAL']
+        while not self._stop.is_set():
+            try:
+                delivered = self.run_once()
+            except Exception as e:
+                self.app.logger.exception(f'Outbox delivery failed: {e}')
+                delivered = 0
+            if not delivered:
+                self._stop.wait(poll_interval)
+
+    def start(self, threads=1):
+        for i in range(threads):
+            threading.Thread(target=self.run_forever, name=f'outbox-{i}', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+def start_with_requests(app, threads):
+    # Started by the first request, so CLI processes (migrations, rebuilds,
+    # `flask outbox-worker` itself) never claim messages they may not finish
+    lock = threading.Lock()
+    started = []
+
+    @app.before_request
+    def start_outbox_worker():
+        if started:
+            return
+        with lock:
+            if not started:
+                OutboxWorker(app).start(threads)
+                started.append(True)
+
+@click.command('outbox-worker')
+@click.option('--once', is_flag=True, help='Deliver what is due and exit.')
+@with_appcontext
+def outbox_worker_command(once):
+    """Deliver queued emails and SMS from the outbox collection."""
+    worker = OutboxWorker(current_app._get_current_object())
+    if once:
+        click.echo(f'Delivered {worker.run_once()} messages')
+        return
+
+    click.echo('Outbox worker running, press Ctrl+C to stop')
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        worker.stop()
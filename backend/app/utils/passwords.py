@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import bcrypt
+
+class PasswordServiceBusy(Exception):
+    pass
+
+class PasswordHasher:
+    # bcrypt releases the GIL, so a small thread pool hashes in parallel
+    # while the bounded queue sheds load instead of pinning every worker
+    def __init__(self):
+        self.rounds = 12
+        self.executor = None
+        self.slots = None
+
+    def init_app(self, app):
+        workers = app.config['BCRYPT_WORKERS']
+        self.rounds = app.config['BCRYPT_ROUNDS']
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self.slots = threading.BoundedSemaphore(workers + app.config['BCRYPT_QUEUE_DEPTH'])
+        app.extensions['password_hasher'] = self
+
+    def _run(self, fn, *args):
+        if not self.slots.acquire(blocking=False):
+            raise PasswordServiceBusy('Too many login attempts in progress, please retry shortly')
+
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self.slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self.slots.release())
+        return future.result()
+
+    def hash(self, password):
+        return self._run(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(self.rounds))
+
+    def verify(self, stored_password, provided_password):
+        if isinstance(stored_password, str):
+            stored_password = stored_password.encode('utf-8')
+        return self._run(bcrypt.checkpw, provided_password.encode('utf-8'), stored_password)
+
+    def needs_rehash(self, stored_password):
+        # Hashes look like $2b$12$..., the cost sits in characters 4-5
+        if isinstance(stored_password, str):
+            stored_password = stored_password.encode('utf-8')
+        return int(stored_password[4:6]) != self.rounds
+
+password_hasher = PasswordHasher()
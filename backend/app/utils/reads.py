@@ -0,0 +1,46 @@
+from app import mongo
+from app.utils.cache import last_write_at
+from datetime import datetime, timedelta
+from flask import current_app
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+READ_PREFERENCES = {
+    'primary': Primary,
+    'primaryPreferred': PrimaryPreferred,
+    'secondary': Secondary,
+    'secondaryPreferred': SecondaryPreferred,
+    'nearest': Nearest
+}
+
+def read_preference(mode, max_staleness=-1):
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f'Unknown read preference: {mode}')
+    if mode == 'primary':
+        return Primary()
+    return READ_PREFERENCES[mode](max_staleness=max_staleness)
+
+def recently_wrote(user_id):
+    # A secondary may lag by up to the staleness bound, so the user's own
+    # writes inside that window are only guaranteed visible on the primary
+    written = last_write_at(user_id)
+    if written is None:
+        return False
+    window = timedelta(seconds=current_app.config['READ_YOUR_WRITES_WINDOW'])
+    return datetime.utcnow() - written < window
+
+def db_for(endpoint, user_id):
+    # Database handle routed per the READ_ROUTING entry for this endpoint
+    routing = current_app.config['READ_ROUTING'].get(endpoint)
+    if not routing:
+        return mongo.db
+
+    mode = routing.get('read_preference', 'primary')
+    if mode != 'primary' and recently_wrote(user_id):
+        mode = 'primary'
+
+    return mongo.cx.get_database(
+        mongo.db.name,
+        read_preference=read_preference(mode, routing.get('max_staleness', -1)),
+        read_concern=ReadConcern(routing.get('read_concern'))
+    )
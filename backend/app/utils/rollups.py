@@ -0,0 +1,134 @@
+from app import mongo
+from app.transactions import archive
+from datetime import datetime, time, timedelta, timezone
+from bson import ObjectId
+from pymongo import UpdateOne
+import click
+from flask.cli import with_appcontext
+
+FIELDS = {'user_id': 1, 'amount': 1, 'category': 1, 'type': 1, 'date': 1}
+
+def month_key(date):
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc)
+    return date.strftime('%Y-%m')
+
+def _naive_utc(date):
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date
+
+def whole_months(start_date, end_date):
+    # Returns (start_month, end_month) when the range covers whole months only
+    start_month = end_month = None
+
+    if start_date:
+        start_date = _naive_utc(start_date)
+        if start_date.day != 1 or start_date.time() != time(0, 0):
+            return None
+        start_month = month_key(start_date)
+
+    if end_date:
+        end_date = _naive_utc(end_date)
+        if (end_date + timedelta(days=1)).day != 1 or end_date.time() < time(23, 59, 59):
+            return None
+        end_month = month_key(end_date)
+
+    return start_month, end_month
+
+def apply_changes(removed=(), added=()):
+    # Merge increments per rollup key so each key is written once
+    deltas = {}
+    for sign, transactions in ((-1, removed), (1, added)):
+        for t in transactions:
+            key = (t['user_id'], month_key(t['date']), t['category'], t['type'])
+            total, count = deltas.get(key, (0, 0))
+            deltas[key] = (total + sign * t['amount'], count + sign)
+
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {'user_id': user_id, 'month': month, 'category': category, 'type': type_},
+            {'$inc': {'total': total, 'count': count}, '$set': {'updated_at': now}},
+            upsert=True
+        )
+        for (user_id, month, category, type_), (total, count) in deltas.items()
+        if total or count
+    ]
+
+    if operations:
+        mongo.db.monthly_rollups.bulk_write(operations, ordered=False)
+
+def record(transaction):
+    apply_changes(added=[transaction])
+
+def unrecord(transaction):
+    apply_changes(removed=[transaction])
+
+PROJECTION = {'month': 1, 'category': 1, 'type': 1, 'total': 1, 'count': 1}
+
+def rollup_query(user_id, start_month=None, end_month=None, **filters):
+    query = {'user_id': ObjectId(user_id), 'count': {'$gt': 0}, **filters}
+    if start_month or end_month:
+        query['month'] = {}
+        if start_month:
+            query['month']['$gte'] = start_month
+        if end_month:
+            query['month']['$lte'] = end_month
+    return query
+
+def find_rollups(user_id, start_month=None, end_month=None, db=None, **filters):
+    db = db if db is not None else mongo.db
+    return db.monthly_rollups.find(rollup_query(user_id, start_month, end_month, **filters), PROJECTION)
+
+def rebuild(user_id=None):
+    query = {'user_id': ObjectId(user_id)} if user_id else {}
+
+    pipeline = [
+        {'$match': query},
+        {
+            '$group': {
+                '_id': {
+                    'user_id': '$user_id',
+                    'month': {'$dateToString': {'format': '%Y-%m', 'date': '$date'}},
+                    'category': '$category',
+                    'type': '$type'
+                },
+                'total': {'$sum': '$amount'},
+                'count': {'$sum': 1}
+            }
+        }
+    ]
+
+    # Archived transactions still count towards their months
+    pipeline = archive.with_archive(pipeline, archive.boundary())
+
+    mongo.db.monthly_rollups.delete_many(query)
+
+    now = datetime.utcnow()
+    batch = []
+    written = 0
+    for r in mongo.db.transactions.aggregate(pipeline, allowDiskUse=True):
+        batch.append({**r['_id'], 'total': r['total'], 'count': r['count'], 'updated_at': now})
+        if len(batch) == 1000:
+            mongo.db.monthly_rollups.insert_many(batch, ordered=False)
+            written += len(batch)
+            batch = []
+
+    if batch:
+        mongo.db.monthly_rollups.insert_many(batch, ordered=False)
+        written += len(batch)
+
+    return written
+
+@click.command('rebuild-rollups')
+@click.option('--user-id', default=None, help='Only rebuild rollups for this user.')
+@with_appcontext
+def rebuild_rollups_command(user_id):
+    """Backfill monthly_rollups from the transactions collection.
+
+    Run while transaction writes are paused; writes that land during the
+    rebuild may be counted twice or not at all.
+    """
+    written = rebuild(user_id)
+    click.echo(f'Rebuilt {written} rollup documents')
@@ -0,0 +1,69 @@
+from app.utils.monitoring import record_serialization
+from datetime import date, datetime
+from flask.json.provider import DefaultJSONProvider
+from time import perf_counter
+from werkzeug.utils import import_string
+from bson import ObjectId
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(value):
+    # Render ids and dates the same way the models' to_json does
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+class JSONProvider(DefaultJSONProvider):
+    default = staticmethod(_default)
+
+    def dumps(self, obj, **kwargs):
+        started = perf_counter()
+        try:
+            return self._dumps(obj, **kwargs)
+        finally:
+            record_serialization(perf_counter() - started)
+
+    def _dumps(self, obj, **kwargs):
+        return super().dumps(obj, **kwargs)
+
+class OrjsonProvider(JSONProvider):
+    # orjson encodes datetimes natively and runs several times faster than json
+    def __init__(self, app):
+        if orjson is None:
+            raise RuntimeError('JSON_PROVIDER is orjson but orjson is not installed')
+        super().__init__(app)
+
+    def _dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+PROVIDERS = {
+    'stdlib': JSONProvider,
+    'orjson': OrjsonProvider
+}
+
+def json_provider(app):
+    name = app.config['JSON_PROVIDER']
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'stdlib'
+    provider_class = PROVIDERS.get(name) or import_string(name)
+    return provider_class(app)
+
+def dumps(obj):
+    # Compact encoder for code outside a Flask request (the ASGI routes)
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, separators=(',', ':')).encode('utf-8')
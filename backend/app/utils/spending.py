@@ -0,0 +1,104 @@
+from app import mongo
+from app.models import Budget
+from app.utils import rollups
+from app.transactions import archive
+from datetime import datetime
+from bson import ObjectId
+from flask import current_app
+
+def month_range(month):
+    start_date = datetime.strptime(month, '%Y-%m')
+    if start_date.month == 12:
+        end_date = datetime(start_date.year + 1, 1, 1)
+    else:
+        end_date = datetime(start_date.year, start_date.month + 1, 1)
+    return start_date, end_date
+
+def _date_ranges(months):
+    # Collapse consecutive months into a single date range
+    ranges = []
+    for month in sorted(set(months)):
+        start_date, end_date = month_range(month)
+        if ranges and ranges[-1][1] == start_date:
+            ranges[-1] = (ranges[-1][0], end_date)
+        else:
+            ranges.append((start_date, end_date))
+    return ranges
+
+def build_spent_pipeline(user_id, budgets):
+    categories = sorted({b['category'] for b in budgets})
+    ranges = _date_ranges(b['month'] for b in budgets)
+
+    match = {
+        'user_id': ObjectId(user_id),
+        'category': {'$in': categories},
+        'type': 'expense'
+    }
+    if len(ranges) == 1:
+        match['date'] = {'$gte': ranges[0][0], '$lt': ranges[0][1]}
+    else:
+        match['$or'] = [{'date': {'$gte': start, '$lt': end}} for start, end in ranges]
+
+    return [
+        {'$match': match},
+        {
+            '$group': {
+                '_id': {
+                    'category': '$category',
+                    'month': {'$dateToString': {'format': '%Y-%m', 'date': '$date'}}
+                },
+                'total': {'$sum': '$amount'}
+            }
+        }
+    ]
+
+def index_spent(results):
+    return {(r['_id']['category'], r['_id']['month']): r['total'] for r in results}
+
+def rollup_filters(budgets):
+    return {
+        'type': 'expense',
+        'category': {'$in': sorted({b['category'] for b in budgets})},
+        'month': {'$in': sorted({b['month'] for b in budgets})}
+    }
+
+def index_rollups(results):
+    return {(r['category'], r['month']): r['total'] for r in results}
+
+def calculate_spent(user_id, budgets, db=None):
+    # Spent per (category, month) for all budgets in one aggregation
+    if not budgets:
+        return {}
+
+    db = db if db is not None else mongo.db
+
+    if current_app.config['USE_MONTHLY_ROLLUPS']:
+        return index_rollups(rollups.find_rollups(user_id, db=db, **rollup_filters(budgets)))
+
+    pipeline = archive.with_archive(build_spent_pipeline(user_id, budgets), archive.boundary())
+    return index_spent(db.transactions.aggregate(pipeline))
+
+def spent_for(spent, budget):
+    return spent.get((budget['category'], budget['month']), 0)
+
+def build_overview(month, budgets, spent_by_budget):
+    total_budget = 0
+    total_spent = 0
+    categories = []
+
+    for budget in budgets:
+        total_budget += budget['limit']
+
+        spent = spent_for(spent_by_budget, budget)
+        total_spent += spent
+
+        categories.append(Budget.to_json(budget, spent))
+
+    return {
+        'month': month,
+        'total_budget': total_budget,
+        'total_spent': total_spent,
+        'remaining': total_budget - total_spent,
+        'percentage': (total_spent / total_budget * 100) if total_budget > 0 else 0,
+        'categories': categories
+    }
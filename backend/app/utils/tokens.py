@@ -0,0 +1,146 @@
+from app import jwt, mongo
+from app.models import User
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app, g
+from flask_jwt_extended import decode_token
+import hashlib
+import threading
+import time
+
+class RevokedToken(Exception):
+    pass
+
+class TokenCache:
+    # Verified claims keyed by token hash, dropped once the token expires
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is None:
+                return None
+            if claims['exp'] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def set(self, key, claims):
+        with self._lock:
+            self._entries[key] = claims
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class RevocationFilter:
+    # Bloom filter over revoked jtis: a miss is definitive, a hit is
+    # confirmed against token_blocklist
+    def __init__(self, bits=1 << 20, hashes=4):
+        self.bits = bits
+        self.hashes = hashes
+        self._array = bytearray(bits // 8)
+
+    def _positions(self, jti):
+        digest = hashlib.sha256(jti.encode('utf-8')).digest()
+        for i in range(self.hashes):
+            yield int.from_bytes(digest[i * 4:i * 4 + 4], 'big') % self.bits
+
+    def add(self, jti):
+        for position in self._positions(jti):
+            self._array[position // 8] |= 1 << (position % 8)
+
+    def might_contain(self, jti):
+        return all(self._array[position // 8] & (1 << (position % 8)) for position in self._positions(jti))
+
+class TokenVerifier:
+    def __init__(self):
+        self.cache = TokenCache()
+        self.filter = RevocationFilter()
+        self.refresh_interval = 30
+        self._refreshed_at = 0.0
+        self._refresh_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.cache = TokenCache(app.config['TOKEN_CACHE_MAX_ENTRIES'])
+        self.filter = RevocationFilter(app.config['REVOCATION_FILTER_BITS'], app.config['REVOCATION_FILTER_HASHES'])
+        self.refresh_interval = app.config['REVOCATION_REFRESH_SECONDS']
+        self._refreshed_at = 0.0
+        jwt.token_in_blocklist_loader(lambda jwt_header, jwt_data: self.is_revoked(jwt_data['jti']))
+        app.extensions['token_verifier'] = self
+
+    def _refresh(self):
+        # Pick up revocations made by other processes; one thread reloads at a time
+        if time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+
+        try:
+            revoked = RevocationFilter(self.filter.bits, self.filter.hashes)
+            for doc in mongo.db.token_blocklist.find({}, {'_id': 1}):
+                revoked.add(doc['_id'])
+            self.filter = revoked
+            self._refreshed_at = time.monotonic()
+        finally:
+            self._refresh_lock.release()
+
+    def is_revoked(self, jti):
+        if not self.refresh_interval:
+            return mongo.db.token_blocklist.find_one({'_id': jti}, {'_id': 1}) is not None
+
+        self._refresh()
+        if not self.filter.might_contain(jti):
+            return False
+        return mongo.db.token_blocklist.find_one({'_id': jti}, {'_id': 1}) is not None
+
+    def revoke(self, claims):
+        mongo.db.token_blocklist.update_one(
+            {'_id': claims['jti']},
+            {'$setOnInsert': {
+                'user_id': claims[current_app.config['JWT_IDENTITY_CLAIM']],
+                'type': claims['type'],
+                'expires_at': datetime.utcfromtimestamp(claims['exp'])
+            }},
+            upsert=True
+        )
+        self.filter.add(claims['jti'])
+
+    def verify(self, token):
+        # Signature and expiry are checked once per token, revocation every time
+        key = hashlib.sha256(token.encode('utf-8')).digest()
+        claims = self.cache.get(key)
+        if claims is None:
+            claims = decode_token(token)
+            if claims.get('type') != 'access':
+                raise ValueError('Not an access token')
+            self.cache.set(key, claims)
+
+        if self.is_revoked(claims['jti']):
+            raise RevokedToken('Token has been revoked')
+        return claims
+
+token_verifier = TokenVerifier()
+
+def bearer_token(header):
+    if not header.startswith('Bearer '):
+        raise ValueError('Missing bearer token')
+    return header[len('Bearer '):]
+
+def load_claims(claims):
+    # What verify_jwt_in_request stores, so get_jwt()/get_jwt_identity() work
+    g._jwt_extended_jwt = claims
+    g._jwt_extended_jwt_header = {}
+    g._jwt_extended_jwt_user = {'loaded_user': None}
+    g._jwt_extended_jwt_location = 'headers'
+
+def profile_claims(user):
+    # Tokens carry the profile so GET /profile needs no lookup; large
+    # inline pictures would bloat every request, so those fall back to Mongo
+    picture = user.get('profile_picture') or ''
+    if len(picture) > current_app.config['PROFILE_CLAIM_MAX_PICTURE']:
+        return {}
+    return {'profile': User.to_json(user)}
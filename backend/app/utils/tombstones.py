@@ -0,0 +1,38 @@
+from app import mongo
+from app.utils.rollups import month_key
+from datetime import datetime, timedelta
+from bson import ObjectId
+from flask import current_app
+
+# Tombstones for the month a transaction moved out of; the row itself lives on
+MOVED = 'moved'
+
+def record(collection, user_id, docs):
+    # Deletes leave a tombstone so /api/sync can tell clients to drop the row;
+    # transaction tombstones keep the month so budget spent can be resent.
+    # `collection` is 'transactions', 'budgets' or MOVED
+    now = datetime.utcnow()
+    expires_at = now + timedelta(days=current_app.config['SYNC_TOMBSTONE_DAYS'])
+
+    tombstones = []
+    for doc in docs:
+        tombstone = {
+            'user_id': ObjectId(user_id),
+            'collection': collection,
+            'doc_id': doc['_id'],
+            'deleted_at': now,
+            'expires_at': expires_at
+        }
+        if doc.get('date'):
+            tombstone['month'] = month_key(doc['date'])
+        tombstones.append(tombstone)
+
+    if tombstones:
+        mongo.db.tombstones.insert_many(tombstones, ordered=False)
+
+def record_moves(user_id, before, after):
+    # One per month left, so every month a row passed through since a client's
+    # last sync is resent, however often it was edited since
+    record(MOVED, user_id, [
+        old for old, new in zip(before, after) if month_key(old['date']) != month_key(new['date'])
+    ])
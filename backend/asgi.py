@@ -0,0 +1,5 @@
+from app.aio import create_asgi_app
+
+app = create_asgi_app()
+
+# Run with: uvicorn asgi:app --host 0.0.0.0 --port 5000
@@ -0,0 +1,54 @@
+"""Compare two benchmark result files: python -m benchmarks.compare before.json after.json"""
+import argparse
+import json
+import sys
+
+METRICS = ('p50_ms', 'p99_ms', 'mongo_ops_per_request', 'peak_memory_kb')
+
+def _change(old, new):
+    if old is None or new is None:
+        return None
+    if old == 0:
+        return 0.0 if new == 0 else float('inf')
+    return (new - old) / old * 100
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two benchmark runs.')
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Percent slowdown in p50/p99 reported as a regression')
+    args = parser.parse_args(argv)
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"before {before['meta'].get('commit')}  after {after['meta'].get('commit')}")
+    print(f"{'scenario':<36}" + ''.join(f'{metric:>26}' for metric in METRICS))
+
+    regressions = []
+    for name, new in after['scenarios'].items():
+        old = before['scenarios'].get(name)
+        if old is None:
+            continue
+
+        cells = []
+        for metric in METRICS:
+            change = _change(old.get(metric), new.get(metric))
+            if change is None:
+                cells.append(f'{"-":>26}')
+                continue
+            cells.append(f'{old[metric]:>9.2f} -> {new[metric]:>9.2f} {change:+6.1f}%')
+            if metric in ('p50_ms', 'p99_ms') and change > args.threshold:
+                regressions.append(f'{name} {metric} {change:+.1f}%')
+        print(f'{name:<36}' + ''.join(cells))
+
+    if regressions:
+        print('\nRegressions over threshold:')
+        for regression in regressions:
+            print(f'  {regression}')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""Benchmark every auth, transactions and budgets endpoint.
+
+Run from backend/:
+
+    python -m benchmarks.run                       # in-memory mongomock
+    python -m benchmarks.run --mongo-uri mongodb://localhost:27017/financeflow_bench --reset
+    python -m benchmarks.run --users 50 --transactions 20000 --concurrency 8 --output before.json
+    python -m benchmarks.compare before.json after.json
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from time import perf_counter
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tracemalloc
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(p * (len(sorted_values) - 1))))]
+
+def make_app(args):
+    if not args.mongo_uri:
+        # In-memory Mongo: no server needed, but no command events either
+        try:
+            import mongomock
+        except ImportError:
+            sys.exit('mongomock is not installed: pip install -r benchmarks/requirements.txt, or pass --mongo-uri')
+        import flask_pymongo
+        client = mongomock.MongoClient()
+        flask_pymongo.MongoClient = lambda *a, **kw: client
+
+    from app import create_app
+    from app.config import Config
+
+    class BenchmarkConfig(Config):
+        TESTING = True
+        MONGO_URI = args.mongo_uri or 'mongodb://localhost:27017/financeflow_bench'
+        BCRYPT_ROUNDS = args.bcrypt_rounds
+        CACHE_ENABLED = not args.no_cache
+        USE_MONTHLY_ROLLUPS = args.rollups
+        MAIL_TRANSPORT = 'fake'
+        SMS_TRANSPORT = 'fake'
+        OUTBOX_WORKER_THREADS = 0
+        PROFILE_SAMPLE_RATE = 0
+
+    return create_app(BenchmarkConfig)
+
+def prepare_database(app, args):
+    from app import mongo
+    from app.indexes import INDEXES
+    from benchmarks.seed import seed
+
+    with app.app_context():
+        if mongo.db.users.estimated_document_count():
+            if not args.reset:
+                sys.exit(f'Database {mongo.db.name} already has data, pass --reset to drop it first')
+            mongo.cx.drop_database(mongo.db.name)
+
+        # mongomock ignores partial filters, so its unique indexes would reject the seed data
+        if args.mongo_uri:
+            for collection, models in INDEXES.items():
+                mongo.db[collection].create_indexes(models)
+
+        started = perf_counter()
+        users = seed(args.users, args.transactions, args.budgets, args.months, args.seed)
+        print(f'Seeded {args.users} users x {args.transactions} transactions in {perf_counter() - started:.1f}s', file=sys.stderr)
+        return users
+
+def _drive(app, scenario, calls):
+    from benchmarks.scenarios import response_size
+
+    client = app.test_client()
+    timings = []
+    statuses = {}
+    with app.app_context():
+        for user in calls:
+            state = scenario.setup(client, user) if scenario.setup else None
+
+            started = perf_counter()
+            response = scenario.call(client, user, state)
+            response_size(response)
+            timings.append(perf_counter() - started)
+
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    return timings, statuses
+
+def _route_counters(scenario):
+    from app.utils.monitoring import request_metrics
+
+    stats = request_metrics.routes.get((scenario.method, scenario.route))
+    if stats is None:
+        return 0, 0
+    return stats['latency'].count, stats['mongo_commands']
+
+def run_scenario(app, scenario, users, args):
+    calls = [users[i % len(users)] for i in range(args.iterations)]
+    _drive(app, scenario, calls[:args.warmup])
+
+    requests_before, commands_before = _route_counters(scenario)
+    started = perf_counter()
+    if args.concurrency > 1:
+        chunks = [calls[i::args.concurrency] for i in range(args.concurrency)]
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            results = list(executor.map(lambda chunk: _drive(app, scenario, chunk), chunks))
+    else:
+        results = [_drive(app, scenario, calls)]
+    elapsed = perf_counter() - started
+    requests_after, commands_after = _route_counters(scenario)
+
+    timings = sorted(t for result_timings, _ in results for t in result_timings)
+    statuses = {}
+    for _, result_statuses in results:
+        for code, n in result_statuses.items():
+            statuses[code] = statuses.get(code, 0) + n
+
+    # Peak Python allocations over a short single-threaded pass
+    tracemalloc.start()
+    _drive(app, scenario, calls[:args.memory_iterations])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    served = requests_after - requests_before
+    return {
+        'requests': len(timings),
+        'statuses': {str(code): n for code, n in sorted(statuses.items())},
+        'errors': sum(n for code, n in statuses.items() if code >= 400),
+        'throughput_rps': len(timings) / elapsed if elapsed else None,
+        'mean_ms': sum(timings) / len(timings) * 1000,
+        'p50_ms': percentile(timings, 0.50) * 1000,
+        'p90_ms': percentile(timings, 0.90) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'max_ms': timings[-1] * 1000,
+        'mongo_ops_per_request': (commands_after - commands_before) / served if args.mongo_uri and served else None,
+        'peak_memory_kb': peak / 1024
+    }
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+def add_dataset_arguments(parser):
+    # Backend and seed options shared by the benchmark scripts
+    parser.add_argument('--mongo-uri', help='Real MongoDB to benchmark against (default: in-memory mongomock)')
+    parser.add_argument('--reset', action='store_true', help='Drop the benchmark database if it already has data')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--transactions', type=int, default=1000, help='Transactions per user')
+    parser.add_argument('--budgets', type=int, default=24, help='Budgets per user')
+    parser.add_argument('--months', type=int, default=24, help='History the transactions are spread over')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--bcrypt-rounds', type=int, default=12)
+    parser.add_argument('--no-cache', action='store_true', help='Disable the response cache')
+    parser.add_argument('--rollups', action='store_true', help='Serve stats and budgets from monthly_rollups')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the FinanceFlow API through the Flask test client.')
+    add_dataset_arguments(parser)
+    parser.add_argument('--iterations', type=int, default=50, help='Timed requests per scenario')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--memory-iterations', type=int, default=5, help='Requests per scenario traced for peak memory')
+    parser.add_argument('--concurrency', type=int, default=1, help='Threads issuing requests at once')
+    parser.add_argument('--scenario', action='append', help='Only run scenarios starting with this prefix (repeatable)')
+    parser.add_argument('--output', help='Write JSON results to this file')
+    args = parser.parse_args(argv)
+
+    app = make_app(args)
+    users = prepare_database(app, args)
+
+    from benchmarks.scenarios import SCENARIOS, prepare_user
+
+    with app.app_context():
+        client = app.test_client()
+        users = [prepare_user(client, user) for user in users]
+
+    results = {}
+    for scenario in SCENARIOS:
+        if args.scenario and not any(scenario.name.startswith(prefix) for prefix in args.scenario):
+            continue
+        if scenario.server_only and not args.mongo_uri:
+            print(f'{scenario.name:<36} skipped (needs --mongo-uri)', file=sys.stderr)
+            continue
+
+        result = results[scenario.name] = run_scenario(app, scenario, users, args)
+        ops = result['mongo_ops_per_request']
+        print(f"{scenario.name:<36} p50 {result['p50_ms']:8.2f}ms  p99 {result['p99_ms']:8.2f}ms  "
+              f"ops {'-' if ops is None else f'{ops:5.1f}'}  peak {result['peak_memory_kb']:8.0f}KB  "
+              f"errors {result['errors']}", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'backend': 'mongodb' if args.mongo_uri else 'mongomock',
+            'args': {k: v for k, v in vars(args).items() if k not in ('output', 'mongo_uri')}
+        },
+        'scenarios': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Results written to {args.output}', file=sys.stderr)
+    return report
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+from app import mongo
+from bson import ObjectId
+from itertools import count
+
+# Unique suffixes for requests that must not collide (emails, budget categories)
+_sequence = count()
+
+class Scenario:
+    def __init__(self, name, method, route, call, setup=None, server_only=False):
+        self.name = name
+        self.method = method
+        self.route = route  # URL rule, used to look up per-route Mongo counters
+        self.call = call
+        self.setup = setup
+        self.server_only = server_only  # needs a real mongod (e.g. $dateTrunc)
+
+def _transaction(category='Food', amount=12.5, date='2024-01-15'):
+    return {'amount': amount, 'category': category, 'type': 'expense', 'description': 'benchmark', 'date': date}
+
+def _month_range(month):
+    year, mon = map(int, month.split('-'))
+    end = f'{year + (mon == 12):04d}-{mon % 12 + 1:02d}-01T00:00:00'
+    return f'{month}-01T00:00:00', end
+
+# Setup steps run untimed before each call and return per-call state
+
+def _reset_token(client, user):
+    client.post('/api/auth/forgot-password', json={'method': 'email', 'email': user['email']})
+    reset = mongo.db.password_resets.find_one({'user_id': ObjectId(user['id'])}, sort=[('_id', -1)])
+    return reset['token']
+
+def _created_transaction(client, user):
+    response = client.post('/api/transactions/', json=_transaction(), headers=user['headers'])
+    return response.get_json()['transaction']['id']
+
+def _bulk_created(client, user):
+    category = f'BenchDelete{next(_sequence)}'
+    client.post('/api/transactions/bulk', json=[_transaction(category) for _ in range(20)], headers=user['headers'])
+    return category
+
+def _created_budget(client, user):
+    response = client.post('/api/budgets/', json={
+        'category': f'Bench{next(_sequence)}',
+        'limit': 100,
+        'month': user['month']
+    }, headers=user['headers'])
+    return response.get_json()['budget']['id']
+
+def _sync_token(client, user):
+    # A token taken just before one new transaction, like a client reopening
+    token = client.get('/api/sync', headers=user['headers']).get_json()['token']
+    client.post('/api/transactions/', json=_transaction(), headers=user['headers'])
+    return token
+
+SCENARIOS = [
+    # Auth
+    Scenario('auth.register', 'POST', '/api/auth/register', lambda c, u, s: c.post('/api/auth/register', json={
+        'email': f'bench-register-{next(_sequence)}@example.com', 'password': u['password']
+    })),
+    Scenario('auth.login', 'POST', '/api/auth/login', lambda c, u, s: c.post('/api/auth/login', json={
+        'email': u['email'], 'password': u['password']
+    })),
+    Scenario('auth.profile', 'GET', '/api/auth/profile', lambda c, u, s: c.get('/api/auth/profile', headers=u['headers'])),
+    Scenario('auth.update_profile', 'PUT', '/api/auth/profile', lambda c, u, s: c.put('/api/auth/profile', json={
+        'name': 'Benchmark User'
+    }, headers=u['headers'])),
+    Scenario('auth.forgot_password', 'POST', '/api/auth/forgot-password', lambda c, u, s: c.post('/api/auth/forgot-password', json={
+        'method': 'email', 'email': u['email']
+    })),
+    Scenario('auth.reset_password', 'POST', '/api/auth/reset-password', lambda c, u, s: c.post('/api/auth/reset-password', json={
+        'token': s, 'password': u['password']
+    }), setup=_reset_token),
+    Scenario('auth.change_password', 'POST', '/api/auth/change-password', lambda c, u, s: c.post('/api/auth/change-password', json={
+        'current_password': u['password'], 'new_password': u['password']
+    }, headers=u['headers'])),
+
+    # Transactions
+    Scenario('transactions.create', 'POST', '/api/transactions/', lambda c, u, s: c.post(
+        '/api/transactions/', json=_transaction(), headers=u['headers'])),
+    Scenario('transactions.bulk_create', 'POST', '/api/transactions/bulk', lambda c, u, s: c.post(
+        '/api/transactions/bulk', json=[_transaction(amount=i) for i in range(100)], headers=u['headers'])),
+    Scenario('transactions.list', 'GET', '/api/transactions/', lambda c, u, s: c.get(
+        '/api/transactions/?page=5', headers=u['headers'])),
+    Scenario('transactions.list_without_total', 'GET', '/api/transactions/', lambda c, u, s: c.get(
+        '/api/transactions/?page=5&include_total=false', headers=u['headers'])),
+    Scenario('transactions.list_cursor', 'GET', '/api/transactions/', lambda c, u, s: c.get(
+        '/api/transactions/?cursor=', headers=u['headers'])),
+    Scenario('transactions.list_filtered', 'GET', '/api/transactions/', lambda c, u, s: c.get(
+        '/api/transactions/?category=Food&type=expense', headers=u['headers'])),
+    Scenario('transactions.search', 'GET', '/api/transactions/', lambda c, u, s: c.get(
+        '/api/transactions/?q=amazon', headers=u['headers']), server_only=True),
+    Scenario('transactions.suggest', 'GET', '/api/transactions/suggest', lambda c, u, s: c.get(
+        '/api/transactions/suggest?prefix=st', headers=u['headers'])),
+    Scenario('transactions.get', 'GET', '/api/transactions/<transaction_id>', lambda c, u, s: c.get(
+        f"/api/transactions/{u['transaction_id']}", headers=u['headers'])),
+    Scenario('transactions.update', 'PUT', '/api/transactions/<transaction_id>', lambda c, u, s: c.put(
+        f"/api/transactions/{u['transaction_id']}", json={'description': 'updated'}, headers=u['headers'])),
+    Scenario('transactions.bulk_update', 'PUT', '/api/transactions/bulk', lambda c, u, s: c.put(
+        '/api/transactions/bulk', json={'filter': {'category': 'Travel'}, 'set': {'description': 'trip'}}, headers=u['headers'])),
+    Scenario('transactions.delete', 'DELETE', '/api/transactions/<transaction_id>', lambda c, u, s: c.delete(
+        f'/api/transactions/{s}', headers=u['headers']), setup=_created_transaction),
+    Scenario('transactions.bulk_delete', 'DELETE', '/api/transactions/bulk', lambda c, u, s: c.delete(
+        '/api/transactions/bulk', json={'filter': {'category': s}}, headers=u['headers']), setup=_bulk_created),
+    Scenario('transactions.stats', 'GET', '/api/transactions/stats', lambda c, u, s: c.get(
+        '/api/transactions/stats', headers=u['headers'])),
+    Scenario('transactions.stats_detailed', 'GET', '/api/transactions/stats', lambda c, u, s: c.get(
+        '/api/transactions/stats?detailed=true', headers=u['headers'])),
+    Scenario('transactions.stats_month', 'GET', '/api/transactions/stats', lambda c, u, s: c.get(
+        '/api/transactions/stats?start_date={}&end_date={}'.format(*_month_range(u['month'])), headers=u['headers'])),
+    Scenario('transactions.timeseries', 'GET', '/api/transactions/stats/timeseries', lambda c, u, s: c.get(
+        '/api/transactions/stats/timeseries?interval=month&group_by=category', headers=u['headers']), server_only=True),
+    Scenario('transactions.export_csv', 'GET', '/api/transactions/export', lambda c, u, s: c.get(
+        '/api/transactions/export?format=csv', headers=u['headers'])),
+    Scenario('transactions.export_ndjson', 'GET', '/api/transactions/export', lambda c, u, s: c.get(
+        '/api/transactions/export?format=ndjson', headers=u['headers'])),
+
+    # Budgets
+    Scenario('budgets.create', 'POST', '/api/budgets/', lambda c, u, s: c.post('/api/budgets/', json={
+        'category': f'Bench{next(_sequence)}', 'limit': 100, 'month': u['month']
+    }, headers=u['headers'])),
+    Scenario('budgets.list', 'GET', '/api/budgets/', lambda c, u, s: c.get('/api/budgets/', headers=u['headers'])),
+    Scenario('budgets.list_month', 'GET', '/api/budgets/', lambda c, u, s: c.get(
+        f"/api/budgets/?month={u['month']}", headers=u['headers'])),
+    Scenario('budgets.get', 'GET', '/api/budgets/<budget_id>', lambda c, u, s: c.get(
+        f"/api/budgets/{u['budget_id']}", headers=u['headers'])),
+    Scenario('budgets.update', 'PUT', '/api/budgets/<budget_id>', lambda c, u, s: c.put(
+        f"/api/budgets/{u['budget_id']}", json={'limit': 500}, headers=u['headers'])),
+    Scenario('budgets.delete', 'DELETE', '/api/budgets/<budget_id>', lambda c, u, s: c.delete(
+        f'/api/budgets/{s}', headers=u['headers']), setup=_created_budget),
+    Scenario('budgets.overview', 'GET', '/api/budgets/overview', lambda c, u, s: c.get(
+        f"/api/budgets/overview?month={u['month']}", headers=u['headers'])),
+
+    # Sync
+    Scenario('sync.delta', 'GET', '/api/sync', lambda c, u, s: c.get(
+        f'/api/sync?since={s}', headers=u['headers']), setup=_sync_token)
+]
+
+def prepare_user(client, user):
+    # Log in once and pick the records the read/update scenarios target
+    response = client.post('/api/auth/login', json={'email': user['email'], 'password': user['password']})
+    user = {**user, 'headers': {'Authorization': f"Bearer {response.get_json()['access_token']}"}}
+
+    transaction = mongo.db.transactions.find_one({'user_id': ObjectId(user['id'])}, {'_id': 1})
+    budget = mongo.db.budgets.find_one({'user_id': ObjectId(user['id'])}, {'_id': 1})
+    user['transaction_id'] = str(transaction['_id']) if transaction else str(ObjectId())
+    user['budget_id'] = str(budget['_id']) if budget else str(ObjectId())
+    return user
+
+def response_size(response):
+    # Streaming exports are consumed here so the timing covers the whole body
+    return len(response.get_data())
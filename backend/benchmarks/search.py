@@ -0,0 +1,94 @@
+"""Search benchmark: python -m benchmarks.search [--mongo-uri ...]
+
+Compares what clients do today (page through the full history and filter
+locally) and a server-side regex scan with q= text search and the prefix
+suggestions. Text search needs a real mongod.
+"""
+from app import mongo
+from bson import ObjectId
+from time import perf_counter
+import argparse
+import json
+import re
+import sys
+
+def _scan(client, user, term):
+    # Page through everything, filtering client-side
+    matches, page = [], 1
+    while True:
+        body = client.get(f'/api/transactions/?page={page}&limit=100', headers=user['headers']).get_json()
+        needle = term.lower()
+        matches += [t for t in body['transactions'] if needle in t['description'].lower() or needle in t['category'].lower()]
+        if page >= body['pages']:
+            return len(matches)
+        page += 1
+
+def _regex(client, user, term):
+    pattern = re.compile(re.escape(term), re.IGNORECASE)
+    return mongo.db.transactions.count_documents({
+        'user_id': ObjectId(user['id']),
+        '$or': [{'description': pattern}, {'category': pattern}]
+    })
+
+def _text(client, user, term):
+    return client.get(f'/api/transactions/?q={term}&limit=100', headers=user['headers']).get_json()['total']
+
+def _suggest(client, user, term):
+    body = client.get(f'/api/transactions/suggest?prefix={term[:3]}', headers=user['headers']).get_json()
+    return sum(len(values) for values in body.values())
+
+STRATEGIES = {
+    'scan': _scan,
+    'regex': _regex,
+    'text': _text,
+    'suggest': _suggest
+}
+
+def main(argv=None):
+    from benchmarks.run import add_dataset_arguments, make_app, percentile, prepare_database
+    from benchmarks.scenarios import prepare_user
+
+    parser = argparse.ArgumentParser(description='Benchmark transaction search strategies.')
+    add_dataset_arguments(parser)
+    parser.add_argument('--term', action='append', help='Search term (repeatable, default: amazon, uber, netflix)')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    args = parser.parse_args(argv)
+    args.no_cache = True
+
+    app = make_app(args)
+    users = prepare_database(app, args)
+    terms = args.term or ['amazon', 'uber', 'netflix']
+
+    results = {}
+    with app.app_context():
+        client = app.test_client()
+        users = [prepare_user(client, user) for user in users]
+
+        for name, strategy in STRATEGIES.items():
+            if name == 'text' and not args.mongo_uri:
+                print(f'{name:<8} skipped (needs --mongo-uri)', file=sys.stderr)
+                continue
+
+            timings = []
+            for i in range(args.iterations):
+                user, term = users[i % len(users)], terms[i % len(terms)]
+                started = perf_counter()
+                strategy(client, user, term)
+                timings.append(perf_counter() - started)
+
+            timings.sort()
+            results[name] = {
+                'p50_ms': percentile(timings, 0.50) * 1000,
+                'p99_ms': percentile(timings, 0.99) * 1000,
+                'mean_ms': sum(timings) / len(timings) * 1000
+            }
+            print(f"{name:<8} p50 {results[name]['p50_ms']:9.2f}ms  p99 {results[name]['p99_ms']:9.2f}ms", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': {k: v for k, v in vars(args).items() if k != 'mongo_uri'}, 'results': results}, f, indent=2)
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+from app import mongo
+from app.models import Budget, Transaction
+from app.utils.passwords import password_hasher
+from app.transactions import search
+from app.utils import rollups
+from datetime import datetime, timedelta
+import random
+
+PASSWORD = 'benchmark-password'
+
+# Category, share of expenses, typical amount
+EXPENSE_CATEGORIES = [
+    ('Food', 0.30, 25),
+    ('Transport', 0.15, 15),
+    ('Shopping', 0.15, 60),
+    ('Bills', 0.10, 120),
+    ('Entertainment', 0.10, 40),
+    ('Health', 0.08, 50),
+    ('Travel', 0.05, 300),
+    ('Education', 0.04, 80),
+    ('Rent', 0.03, 1200)
+]
+INCOME_CATEGORIES = ['Salary', 'Freelance', 'Investments']
+PAYEES = {
+    'Food': ['Whole Foods', 'Trader Joes', 'Starbucks', 'Chipotle', 'Local Bakery', 'Uber Eats'],
+    'Transport': ['Uber', 'Lyft', 'Shell', 'Metro Card', 'City Parking'],
+    'Shopping': ['Amazon', 'Target', 'IKEA', 'Best Buy', 'Zara'],
+    'Bills': ['Electric Company', 'Water Utility', 'Comcast', 'Verizon'],
+    'Entertainment': ['Netflix', 'Spotify', 'AMC Theatres', 'Steam'],
+    'Health': ['CVS Pharmacy', 'Dental Clinic', 'Gym Membership'],
+    'Travel': ['Delta Airlines', 'Airbnb', 'Marriott', 'Expedia'],
+    'Education': ['Coursera', 'Bookstore', 'Udemy'],
+    'Rent': ['Landlord'],
+    'Salary': ['Employer Payroll'],
+    'Freelance': ['Client Invoice', 'Upwork'],
+    'Investments': ['Brokerage Dividend', 'Savings Interest']
+}
+INCOME_SHARE = 0.1
+
+def month_keys(months, now):
+    keys = []
+    year, month = now.year, now.month
+    for _ in range(months):
+        keys.append(f'{year:04d}-{month:02d}')
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return keys
+
+def _transaction(rng, user_id, start, span):
+    date = start + timedelta(seconds=rng.randrange(span))
+    if rng.random() < INCOME_SHARE:
+        category, kind, amount = rng.choice(INCOME_CATEGORIES), 'income', rng.lognormvariate(7.5, 0.5)
+    else:
+        category, _, typical = rng.choices(EXPENSE_CATEGORIES, weights=[c[1] for c in EXPENSE_CATEGORIES])[0]
+        kind, amount = 'expense', rng.lognormvariate(0, 0.6) * typical
+
+    return Transaction.create({
+        'amount': round(amount, 2),
+        'category': category,
+        'type': kind,
+        'description': rng.choice(PAYEES[category]),
+        'date': date.isoformat()
+    }, user_id)
+
+def seed(users=10, transactions_per_user=1000, budgets_per_user=24, months=24, seed=42, batch_size=1000):
+    """Insert synthetic users, transactions and budgets; returns the seeded users."""
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    start = now - timedelta(days=30 * months)
+    span = int((now - start).total_seconds())
+
+    # One bcrypt hash shared by every seeded user keeps seeding fast
+    password = password_hasher.hash(PASSWORD)
+    seeded = []
+
+    for i in range(users):
+        email = f'bench-{seed}-{i}@example.com'
+        result = mongo.db.users.insert_one({
+            'email': email,
+            'password': password,
+            'name': f'Benchmark User {i}',
+            'phone': '',
+            'profile_picture': '',
+            'created_at': now,
+            'updated_at': now
+        })
+        user_id = str(result.inserted_id)
+
+        batch = []
+        for _ in range(transactions_per_user):
+            batch.append(_transaction(rng, user_id, start, span))
+            if len(batch) >= batch_size:
+                mongo.db.transactions.insert_many(batch, ordered=False)
+                batch = []
+        if batch:
+            mongo.db.transactions.insert_many(batch, ordered=False)
+
+        # Budgets cycle through categories, most recent months first
+        budgets = []
+        keys = month_keys(months, now)
+        for j in range(budgets_per_user):
+            category = EXPENSE_CATEGORIES[j % len(EXPENSE_CATEGORIES)][0]
+            month = keys[(j // len(EXPENSE_CATEGORIES)) % len(keys)]
+            budgets.append(Budget.create({'category': category, 'limit': rng.choice([100, 250, 500, 1000]), 'month': month}, user_id))
+        if budgets:
+            mongo.db.budgets.insert_many(budgets, ordered=False)
+
+        seeded.append({'id': user_id, 'email': email, 'password': PASSWORD, 'month': keys[0]})
+
+    rollups.rebuild()
+    search.rebuild()
+    return seeded
@@ -0,0 +1,69 @@
+"""Per-row cost of serializing transaction pages: python -m benchmarks.serialization"""
+from datetime import datetime, timedelta
+from time import perf_counter
+import argparse
+import json
+import sys
+
+def _rows(count):
+    from bson import ObjectId
+
+    now = datetime.utcnow()
+    return [{
+        '_id': ObjectId(),
+        'amount': 12.5 + i,
+        'category': 'Food',
+        'type': 'expense',
+        'description': f'Groceries #{i}',
+        'date': now - timedelta(days=i),
+        'created_at': now
+    } for i in range(count)]
+
+def _time(fn, repeat):
+    fn()
+    started = perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (perf_counter() - started) / repeat
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure JSON serialization cost per transaction row.')
+    parser.add_argument('--rows', type=int, default=100, help='Rows per page')
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    args = parser.parse_args(argv)
+
+    from flask import Flask
+    from app.config import Config
+    from app.models import Transaction
+    from app.utils.serialization import PROVIDERS, orjson
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    rows = _rows(args.rows)
+
+    results = {}
+    with app.test_request_context():
+        page = {'transactions': [Transaction.to_json(t) for t in rows], 'total': 1000, 'page': 1, 'pages': 10}
+        results['to_json'] = _time(lambda: [Transaction.to_json(t) for t in rows], args.repeat)
+
+        for name, provider_class in PROVIDERS.items():
+            if name == 'orjson' and orjson is None:
+                continue
+            provider = provider_class(app)
+            results[f'{name}.dumps'] = _time(lambda: provider.dumps(page), args.repeat)
+            results[f'{name}.page'] = _time(lambda: provider.response({
+                'transactions': [Transaction.to_json(t) for t in rows], 'total': 1000, 'page': 1, 'pages': 10
+            }), args.repeat)
+
+    report = {name: {'page_us': seconds * 1e6, 'row_us': seconds * 1e6 / args.rows} for name, seconds in results.items()}
+    for name, timing in report.items():
+        print(f"{name:<16} {timing['page_us']:10.1f}us/page  {timing['row_us']:8.2f}us/row", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'rows': args.rows, 'results': report}, f, indent=2)
+    return report
+
+if __name__ == '__main__':
+    main()
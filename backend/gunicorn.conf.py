@@ -0,0 +1,10 @@
+import os
+
+# Live update streams (/api/stream) hold a request thread each for up to an
+# hour, so workers are threaded and STREAM_MAX_CONNECTIONS (per worker) stays
+# below `threads` to leave room for regular requests
+wsgi_app = 'run:app'
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 32))
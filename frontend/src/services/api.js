@@ -11,7 +11,7 @@ const api = axios.create({
 api.interceptors.request.use(
   (config) => {
     const token = localStorage.getItem('access_token')
-    if (token) {
+    if (token && !config.headers.Authorization) {
       config.headers.Authorization = `Bearer ${token}`
     }
     return config
@@ -25,7 +25,8 @@ api.interceptors.request.use(
 api.interceptors.response.use(
   (response) => response,
   (error) => {
-    if (error.response?.status === 401) {
+    // A failed logout has nothing left to clear or redirect from
+    if (error.response?.status === 401 && error.config?.url !== '/auth/logout') {
       localStorage.removeItem('access_token')
       localStorage.removeItem('user')
       window.location.href = '/login'
@@ -42,6 +43,12 @@ export default {
   login(data) {
     return api.post('/auth/login', data)
   },
+  logout(token) {
+    // Sent with the token explicitly, since the caller clears storage right away
+    return api.post('/auth/logout', null, {
+      headers: { Authorization: `Bearer ${token}` }
+    })
+  },
   getProfile() {
     return api.get('/auth/profile')
   },
@@ -102,5 +109,18 @@ export default {
   },
   getBudgetOverview(params) {
     return api.get('/budgets/overview', { params })
+  },
+
+  // Delta sync: omit since for a fresh token
+  sync(since) {
+    return api.get('/sync', { params: since ? { since } : {} })
+  },
+
+  // Live updates (EventSource cannot send headers, so the token goes in the URL)
+  async openStream() {
+    // EventSource puts credentials in the URL, so it gets a short-lived ticket
+    // rather than the access token and the profile it carries
+    const { data } = await api.post('/stream/ticket')
+    return new EventSource(`${api.defaults.baseURL}/stream?ticket=${encodeURIComponent(data.ticket)}`)
   }
 }
\ No newline at end of file
@@ -67,6 +67,11 @@ export const useAuthStore = defineStore('auth', {
         const response = await api.updateProfile(data)
         this.user = response.data.user
         localStorage.setItem('user', JSON.stringify(this.user))
+        // The profile travels in the token, so take the refreshed one
+        if (response.data.access_token) {
+          this.token = response.data.access_token
+          localStorage.setItem('access_token', this.token)
+        }
         return response.data
       } catch (error) {
         this.error = error.response?.data?.error || 'Update failed'
@@ -77,6 +82,10 @@ export const useAuthStore = defineStore('auth', {
     },
 
     logout() {
+      // Revoke the token server-side; local state is cleared either way
+      if (this.token) {
+        api.logout(this.token).catch(() => {})
+      }
       this.user = null
       this.token = null
       localStorage.removeItem('access_token')